@@ -1,27 +1,114 @@
-import argparse
 import os
 import sys
 import shutil
+import stat
 import json
 import hashlib
+import time
+import contextlib
+import itertools
+import mmap
 from pathlib import Path
+from types import SimpleNamespace
 from datetime import datetime
-from tqdm import tqdm
-from colorama import Fore, Style
-import urllib.request
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used as a fallback
+    orjson = None
 
 LEVELZAP_VERSION = "0.4"
+LOG_FORMAT_VERSION = 2
+# Separates the hashed body of a log from its trailing hash field. Actions are
+# written one per line, so this sequence can only occur at the trailer.
+LOG_HASH_MARKER = b',\n"hash": "'
+# hashlib algorithm sealing new logs; recorded as meta["hash_algo"] so a log
+# is always checked with the algorithm that wrote it. SHA-256 is hardware
+# accelerated on current CPUs and outruns BLAKE2 there
+LOG_HASH_ALGORITHM = "sha256"
+LOG_PREFIX = "levelzap.log."
+LOG_SUFFIX = ".json"
+# Seconds to wait for the release API before giving up on an update check
+UPDATE_TIMEOUT = 3
+# A cached release younger than this many seconds is used without asking
+# the API again
+UPDATE_CACHE_TTL = 24 * 60 * 60
+# Logs are hashed in blocks of this size when read back
+LOG_READ_CHUNK = 1024 * 1024
+# Flattening only fans out to worker threads above this many subfolders;
+# below it the thread start-up cost outweighs the overlapped renames
+PARALLEL_MIN_SUBFOLDERS = 4
+# Progress bars are advanced once per this many entries rather than for
+# every file. Bars are made with disable=None, which turns them off when
+# stderr is not a terminal
+PROGRESS_BATCH = 256
+def _walk_workers():
+    """Thread count from LEVELZAP_WALK_THREADS, else twice the CPU count
+
+    A value that is not an integer is ignored; any other is raised to at
+    least one thread.
+    """
+    try:
+        return max(1, int(os.environ["LEVELZAP_WALK_THREADS"]))
+    except (KeyError, ValueError):
+        return min(32, (os.cpu_count() or 1) * 2)
+
+# Threads listing folders in parallel when sizing or counting a whole tree;
+# folder reads are latency bound on network filesystems, so this exceeds the
+# CPU count. LEVELZAP_WALK_THREADS overrides it
+WALK_WORKERS = _walk_workers()
+# A folder replaced by overwrite_folder is renamed aside with this suffix and
+# deleted in the background. Windows cannot rename over a directory that is
+# in use as reliably, so there the folder is removed inline as before
+TRASH_SUFFIX = ".levelzap_trash"
+USE_TRASH = os.name != "nt"
+_trash_pool = None
+_trash_futures = []
+_trash_ids = itertools.count(1)
+
+def _dumps(obj) -> bytes:
+    """Serialize obj to compact JSON bytes, using orjson when available"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except orjson.JSONEncodeError:
+            # e.g. undecodable file names (lone surrogates) that only the
+            # stdlib encoder can escape
+            pass
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+def _loads(data):
+    """Parse JSON from bytes, using orjson when available"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # e.g. lone surrogates that _dumps wrote through the stdlib
+            # encoder for undecodable file names; orjson rejects them
+            pass
+    return json.loads(data)
 
 class OutputManager:
     """Handles all output, logging, and display operations for LevelZap"""
     
-    def __init__(self):
-        pass
+    def __init__(self, color=None):
+        """Colour output when stdout is a terminal, unless ``color`` is given"""
+        if color is None:
+            color = sys.stdout is not None and sys.stdout.isatty()
+        if color:
+            from colorama import Fore, Style
+            self.red, self.green, self.yellow = Fore.RED, Fore.GREEN, Fore.YELLOW
+            self.bright_cyan, self.reset = Fore.CYAN + Style.BRIGHT, Style.RESET_ALL
+        else:
+            self.red = self.green = self.yellow = self.bright_cyan = self.reset = ""
+        self._error_prefix = f"{self.red}❌ "
+        self._warning_prefix = f"{self.yellow}⚠️  "
+        self._success_prefix = f"{self.green}✅ "
     
     def print_header(self):
         """Print the application header"""
-        print(f"{Fore.CYAN}{Style.BRIGHT}LevelZap v{LEVELZAP_VERSION}{Style.RESET_ALL} - Flatten and clean folder structures")
-        print(f"{Fore.GREEN}Visit https://github.com/dterracino/levelzap-python for updates{Style.RESET_ALL}\n")
+        print(f"{self.bright_cyan}LevelZap v{LEVELZAP_VERSION}{self.reset} - Flatten and clean folder structures")
+        print(f"{self.green}Visit https://github.com/dterracino/levelzap-python for updates{self.reset}\n")
     
     def print_operation_start(self, operation_type, folder_count, root_path, simulate=False):
         """Print operation start information"""
@@ -30,15 +117,15 @@ class OutputManager:
     
     def print_error(self, message):
         """Print error message with formatting"""
-        print(f"{Fore.RED}❌ {message}{Style.RESET_ALL}")
+        print(self._error_prefix + str(message) + self.reset)
     
     def print_warning(self, message):
         """Print warning message with formatting"""
-        print(f"{Fore.YELLOW}⚠️  {message}{Style.RESET_ALL}")
+        print(self._warning_prefix + str(message) + self.reset)
     
     def print_success(self, message):
         """Print success message with formatting"""
-        print(f"{Fore.GREEN}✅ {message}{Style.RESET_ALL}")
+        print(self._success_prefix + str(message) + self.reset)
     
     def print_info(self, message):
         """Print info message"""
@@ -57,6 +144,108 @@ class OutputManager:
         else:
             print(f"\n📝 Log written to: {log_path}")
 
+def _walk_files(root, recursive=True):
+    """Yield a DirEntry for every file under root, without following symlinks
+
+    Subfolders that cannot be listed are skipped, as rglob does.
+    """
+    stack = [os.fspath(root)]
+    first = True
+    while stack:
+        folder = stack.pop()
+        try:
+            it = os.scandir(folder)
+        except OSError:
+            if first:
+                raise
+            continue
+        first = False
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        yield entry
+                except OSError:
+                    continue
+
+def _scan_totals(folder, sizes):
+    """List one folder, returning ``(file count, total size, subfolders)``"""
+    count = size = 0
+    subfolders = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subfolders.append(entry.path)
+                elif entry.is_file():
+                    count += 1
+                    if sizes:
+                        size += entry.stat().st_size
+            except OSError:
+                continue
+    return count, size, subfolders
+
+def _parallel_walk(root, sizes=False):
+    """Return ``(file count, total size)`` for the whole tree under root
+
+    Worker threads share a queue of folders still to be listed, queueing
+    each subfolder they find, so directory reads overlap. Every worker keeps
+    its own totals, summed once the queue drains. Subfolders that cannot be
+    listed are skipped, as in _walk_files.
+    """
+    count, size, pending = _scan_totals(os.fspath(root), sizes)
+    if not pending:
+        return count, size
+    import queue
+    import threading
+    folders = queue.SimpleQueue()
+    for folder in pending:
+        folders.put(folder)
+    outstanding = len(pending)
+    lock = threading.Lock()
+    drained = threading.Event()
+    totals = []
+    
+    def work():
+        nonlocal outstanding
+        files = total = 0
+        while (folder := folders.get()) is not None:
+            subfolders = ()
+            try:
+                found, found_size, subfolders = _scan_totals(folder, sizes)
+                files += found
+                total += found_size
+            except OSError:
+                pass
+            finally:
+                # Count new work before queueing it, so a sibling finishing
+                # one of these first cannot see the queue as drained
+                if subfolders:
+                    with lock:
+                        outstanding += len(subfolders)
+                    for subfolder in subfolders:
+                        folders.put(subfolder)
+                with lock:
+                    outstanding -= 1
+                    if not outstanding:
+                        drained.set()
+        totals.append((files, total))
+    
+    workers = [threading.Thread(target=work, daemon=True) for _ in range(max(1, WALK_WORKERS))]
+    for worker in workers:
+        worker.start()
+    drained.wait()
+    for worker in workers:
+        folders.put(None)
+    for worker in workers:
+        worker.join()
+    return count + sum(t[0] for t in totals), size + sum(t[1] for t in totals)
+
+SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+
 class FileAnalyzer:
     """Handles file analysis operations like counting and size calculation"""
     
@@ -70,17 +259,9 @@ class FileAnalyzer:
             if not path.exists() or not path.is_dir():
                 raise ValueError(f"Invalid directory: {path}")
             
-            count = 0
             if recursive:
-                for item in path.rglob('*'):
-                    if item.is_file():
-                        count += 1
-            else:
-                for item in path.iterdir():
-                    if item.is_file():
-                        count += 1
-            
-            return count
+                return _parallel_walk(path)[0]
+            return sum(1 for _ in _walk_files(path, recursive))
         except Exception as e:
             self.output.print_error(f"Failed to count files: {e}")
             return 0
@@ -92,22 +273,16 @@ class FileAnalyzer:
             if not path.exists() or not path.is_dir():
                 raise ValueError(f"Invalid directory: {path}")
             
-            total_size = 0
             if recursive:
-                for item in path.rglob('*'):
-                    if item.is_file():
-                        try:
-                            total_size += item.stat().st_size
-                        except OSError:
-                            # Handle permission errors or broken symlinks
-                            continue
-            else:
-                for item in path.iterdir():
-                    if item.is_file():
-                        try:
-                            total_size += item.stat().st_size
-                        except OSError:
-                            continue
+                return _parallel_walk(path, sizes=True)[1]
+            
+            total_size = 0
+            for entry in _walk_files(path, recursive):
+                try:
+                    total_size += entry.stat().st_size
+                except OSError:
+                    # Handle permission errors or broken symlinks
+                    continue
             
             return total_size
         except Exception as e:
@@ -119,13 +294,63 @@ class FileAnalyzer:
         if size_bytes == 0:
             return "0 B"
         
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.1f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.1f} PB"
+        # Each unit is 2**10 times the last, so the bit length picks it
+        index = min(len(SIZE_UNITS) - 1, max(0, (int(size_bytes).bit_length() - 1) // 10))
+        return f"{size_bytes / (1 << (index * 10)):.1f} {SIZE_UNITS[index]}"
+
+# Boolean options mapped to their argparse dest. A command line made up of
+# only these and at most one target is parsed without loading argparse
+_FAST_FLAGS = {
+    "-s": "dry_run", "--dry-run": "dry_run",
+    "-r": "revert", "--revert": "revert",
+    "-ra": "revert_all", "--revert-all": "revert_all",
+    "-kl": "keep_logs", "--keep-logs": "keep_logs",
+    "--recurse": "recurse",
+    "--levelzap": "levelzap",
+    "--size": "size",
+    "--count": "count",
+    "--remove-empty": "remove_empty",
+    "--remove-zero": "remove_zero",
+    "-m": "merge", "--merge": "merge",
+    "-o": "overwrite", "--overwrite": "overwrite",
+    "--update": "update",
+    "--list-logs": "list_logs",
+    "--verify": "verify",
+}
+
+def _fast_parse_args(argv):
+    """Parse the common command lines without argparse
+
+    Returns None for anything else (help, option values, abbreviations,
+    errors), which is then left to ``parse_args``.
+    """
+    args = dict.fromkeys(_FAST_FLAGS.values(), False)
+    args["target"] = "."
+    args["duplicate_strategy"] = "rename"
+    target_seen = False
+    for arg in argv:
+        dest = _FAST_FLAGS.get(arg)
+        if dest is not None:
+            args[dest] = True
+        elif arg.startswith("-") or target_seen:
+            return None
+        else:
+            args["target"] = arg
+            target_seen = True
+    if args["merge"] and args["overwrite"]:
+        return None  # let argparse report the conflict
+    return SimpleNamespace(**args)
 
-def parse_args():
+def parse_args(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    args = _fast_parse_args(argv)
+    if args is not None:
+        return args
+    return _build_parser().parse_args(argv)
+
+def _build_parser():
+    import argparse
     parser = argparse.ArgumentParser(
         prog="levelzap",
         description="📂 LevelZap - Flatten subfolders up one level and clean up."
@@ -159,7 +384,7 @@ def parse_args():
     parser.add_argument("--update", action="store_true", help="Check for a newer version of LevelZap on GitHub")
     parser.add_argument("--list-logs", action="store_true", help="List all logs with status, timestamp, and type")
     parser.add_argument("--verify", action="store_true", help="Verify integrity of all LevelZap log files")
-    return parser.parse_args()
+    return parser
 
 def ensure_valid_directory(path, output_manager=None):
     """Ensure the given path is a valid directory"""
@@ -179,8 +404,10 @@ def ensure_valid_directory(path, output_manager=None):
             print(f"❌ {error_msg}")
         sys.exit(1)
 
-def resolve_conflict_path(path: Path, simulated_files=None) -> Path:
+def resolve_conflict_path(path: Path, simulated_files=None, names=None) -> Path:
     """Resolve conflict by finding a non-conflicting path name"""
+    if names is not None:
+        return names.claim_free(path)
     # Check both actual files and simulated files (for simulation mode)
     def path_would_exist(p):
         return p.exists() or (simulated_files and str(p) in simulated_files)
@@ -198,59 +425,234 @@ def resolve_conflict_path(path: Path, simulated_files=None) -> Path:
             return new_path
         i += 1
 
-def perform_action(simulate, action_type, src=None, dst=None, log=None, extra=None, output_manager=None):
-    """Perform the specified action with error handling"""
-    entry = {
-        "action": action_type,
-        "timestamp": datetime.now().isoformat()
-    }
+# Default filesystems on Windows and macOS ignore case, so names that differ
+# only in case must be treated as the same entry there
+_name_key = str.lower if sys.platform in ("win32", "darwin") else str
+
+def _entry_is_dir(entry):
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+class NameCache:
+    """Tracks the entries of the directories files are moved into
+
+    Each directory is listed once, the first time it is asked about; after
+    that ``perform_action`` keeps the entries current as they are moved in
+    or removed, so the cache always describes the tree as it will be once
+    every planned action has run. Existence and type checks, and the search
+    for a free ``_N`` suffix, are dict lookups instead of a ``stat`` each.
+
+    Entries from the original listing keep the type their directory entry
+    reported and are trusted as is. An entry added by a planned action
+    remembers where it came from instead; since that action may fail (e.g.
+    removing a folder that is not empty), such names are confirmed on disk
+    before they are reported as taken or handed out as free. A per-name
+    counter resumes probing where the last conflict for that name left off.
+    """
+
+    def __init__(self, runner=None, simulate=False):
+        self.runner = runner
+        self.simulate = simulate
+        # folder -> {name key: True/False from the listing, else the source
+        # the entry was moved from (None for a claimed name)}
+        self._names = {}
+        self._gone = {}
+        self._counters = {}
+
+    def _listing(self, folder):
+        names = self._names.get(folder)
+        if names is None:
+            if self.runner is not None and self.runner.touches(folder):
+                # Queued moves are about to change this listing
+                self.runner.settle()
+            try:
+                with os.scandir(folder) as it:
+                    names = {_name_key(entry.name): _entry_is_dir(entry) for entry in it}
+            except OSError:
+                names = {}
+            self._names[folder] = names
+            self._gone[folder] = set()
+            self._counters[folder] = {}
+        return names
+
+    def _on_disk(self, path):
+        if self.runner is not None and self.runner.touches(path):
+            self.runner.settle()
+        return os.path.lexists(path)
+
+    def add(self, path, origin=None):
+        """Record that ``path`` now exists, moved there from ``origin``"""
+        folder, name = os.path.split(os.fspath(path))
+        names = self._names.get(folder)
+        if names is not None:
+            names[_name_key(name)] = origin
+            self._gone[folder].discard(_name_key(name))
+
+    def discard(self, path):
+        """Record that ``path`` no longer exists"""
+        folder, name = os.path.split(os.fspath(path))
+        names = self._names.get(folder)
+        if names is not None:
+            key = _name_key(name)
+            names.pop(key, None)
+            self._gone[folder].add(key)
+            # A freed "<base>_<N><ext>" may sit below the counter for
+            # "<base><ext>", so that name is probed from the start again
+            freed = Path(key)
+            base, _, n = freed.stem.rpartition("_")
+            if base and n.isdigit():
+                self._counters[folder].pop(base + freed.suffix, None)
+
+    def exists(self, path):
+        """Whether ``path`` exists once every planned action has run"""
+        if self.runner is not None and self.runner.touches(path):
+            # The caller is about to act on this path, so let queued work
+            # on it finish first whatever the answer
+            self.runner.settle()
+        folder, name = os.path.split(os.fspath(path))
+        names = self._listing(folder)
+        key = _name_key(name)
+        if key in names:
+            # Simulated actions never touch the disk at all
+            if isinstance(names[key], bool) or self.simulate or os.path.lexists(path):
+                return True
+            self.discard(path)
+            return False
+        if key in self._gone[folder]:
+            # Removing a folder fails if something was merged back into it
+            return not self.simulate and os.path.lexists(path)
+        return False
+
+    def is_dir(self, path):
+        """Whether the existing ``path`` is a directory once every planned action has run"""
+        folder, name = os.path.split(os.fspath(path))
+        names = self._listing(folder)
+        key = _name_key(name)
+        kind = names.get(key)
+        if isinstance(kind, bool):
+            return kind
+        # A simulated move leaves the entry at its source
+        result = os.path.isdir(kind if self.simulate and kind else path)
+        if key in names:
+            names[key] = result
+        return result
+
+    def _is_free(self, names, folder, name):
+        key = _name_key(name)
+        if key in names:
+            return False
+        names[key] = None
+        return not self._on_disk(os.path.join(folder, name))
+
+    def claim_free(self, path: Path) -> Path:
+        """Return ``path`` or the first free ``_N`` variant of it, marked as taken"""
+        folder, name = os.path.split(os.fspath(path))
+        names = self._listing(folder)
+        if self._is_free(names, folder, name):
+            return path
+        base = path.stem
+        ext = path.suffix
+        counters = self._counters[folder]
+        key = _name_key(name)
+        i = counters.get(key, 1)
+        while not self._is_free(names, folder, f"{base}_{i}{ext}"):
+            i += 1
+        counters[key] = i + 1
+        return path.parent / f"{base}_{i}{ext}"
+
+def perform_action(simulate, action_type, src=None, dst=None, log=None, extra=None, output_manager=None, known_dirs=None, runner=None, names=None):
+    """Perform the specified action with error handling
+
+    ``src`` and ``dst`` may be ``str`` or ``Path``; they are converted once and
+    the underlying ``os`` calls are used directly. ``known_dirs`` is an optional
+    set of directories already known to exist, used to skip redundant
+    ``makedirs`` calls when moving into them. When a ``runner`` is given the
+    action is logged immediately but queued on it instead of run inline.
+    ``names`` is an optional ``NameCache`` updated with the planned change,
+    simulated or not.
+    """
+    if src is not None:
+        src = os.fspath(src)
+    if dst is not None:
+        dst = os.fspath(dst)
+    entry = {"action": action_type}
     if src:
-        entry["source"] = str(src)
+        entry["source"] = src
     if dst:
-        entry["destination"] = str(dst)
+        entry["destination"] = dst
     if extra:
         entry.update(extra)
+    trash = None
+    if action_type == "overwrite_folder" and USE_TRASH and not simulate:
+        # Where the replaced folder waits until it is deleted, so it can
+        # still be recovered if the run is interrupted
+        trash = entry["trash_path"] = f"{dst}{TRASH_SUFFIX}.{os.getpid()}.{next(_trash_ids)}"
     if log is not None:
         log.append(entry)
+    if names is not None:
+        if src is not None:
+            names.discard(src)
+        if dst is not None:
+            names.add(dst, src)
     if simulate:
         return
-    
+    if runner is not None:
+        runner.add(action_type, src, dst, trash)
+        return
+    execute_action(action_type, src, dst, output_manager, known_dirs, trash)
+
+# Deleting actions, each with its syscall and the warning shown when it fails
+_DELETIONS = {
+    "delete_folder": (os.rmdir, "Could not delete folder (not empty?)"),
+    "delete_empty_folder": (os.rmdir, "Could not delete empty folder"),
+    "delete_zero_file": (os.unlink, "Could not delete zero-byte file"),
+}
+
+def execute_action(action_type, src, dst, output_manager=None, known_dirs=None, trash=None):
+    """Carry out a single filesystem action on ``str`` paths
+
+    ``trash`` is where ``overwrite_folder`` moves the folder it replaces
+    before deleting it in the background; without one the folder is removed
+    inline.
+    """
     try:
         if action_type in ("move", "move_renamed"):
-            dst.parent.mkdir(parents=True, exist_ok=True)
-            src.rename(dst)
-        elif action_type == "overwrite_file":
-            src.replace(dst)
-        elif action_type == "overwrite_folder":
-            shutil.rmtree(dst)
-            src.rename(dst)
-        elif action_type == "delete_folder":
+            parent = os.path.dirname(dst)
+            if known_dirs is None or parent not in known_dirs:
+                os.makedirs(parent, exist_ok=True)
+                if known_dirs is not None:
+                    known_dirs.add(parent)
+            os.rename(src, dst)
+        elif action_type in _DELETIONS:
+            # A failed deletion is only a warning: the item is left in place
+            delete, warning = _DELETIONS[action_type]
             try:
-                src.rmdir()
-            except OSError as e:
-                warning_msg = f"Could not delete folder (not empty?): {src}"
-                if output_manager:
-                    output_manager.print_warning(warning_msg)
-                else:
-                    print(f"⚠️  {warning_msg}")
-        elif action_type == "delete_empty_folder":
-            try:
-                src.rmdir()
-            except OSError as e:
-                warning_msg = f"Could not delete empty folder: {src}"
-                if output_manager:
-                    output_manager.print_warning(warning_msg)
-                else:
-                    print(f"⚠️  {warning_msg}")
-        elif action_type == "delete_zero_file":
-            try:
-                src.unlink()
-            except OSError as e:
-                warning_msg = f"Could not delete zero-byte file: {src}"
+                delete(src)
+            except OSError:
+                warning_msg = f"{warning}: {src}"
                 if output_manager:
                     output_manager.print_warning(warning_msg)
                 else:
                     print(f"⚠️  {warning_msg}")
+        elif action_type == "overwrite_file":
+            os.replace(src, dst)
+        elif action_type == "overwrite_folder":
+            if trash is not None and not os.path.lexists(trash):
+                # Two renames swap the folders at once; the old tree is
+                # removed off the critical path
+                os.rename(dst, trash)
+                try:
+                    os.rename(src, dst)
+                except OSError:
+                    # Put the original back rather than lose both
+                    os.rename(trash, dst)
+                    raise
+                _trash_futures.append(_get_trash_pool().submit(_empty_trash, trash, output_manager))
+            else:
+                shutil.rmtree(dst)
+                os.rename(src, dst)
     except Exception as e:
         error_msg = f"Failed to perform {action_type} on {src}: {e}"
         if output_manager:
@@ -258,29 +660,307 @@ def perform_action(simulate, action_type, src=None, dst=None, log=None, extra=No
         else:
             print(f"❌ {error_msg}")
 
-def get_log_filename():
-    epoch_seconds = int(datetime.now().timestamp())
-    return f"levelzap.log.{epoch_seconds}.json"
+def _get_trash_pool():
+    global _trash_pool
+    if _trash_pool is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _trash_pool = ThreadPoolExecutor(max_workers=2)
+    return _trash_pool
+
+def _empty_trash(trash, output_manager=None):
+    try:
+        shutil.rmtree(trash)
+    except OSError as e:
+        warning_msg = f"Could not delete replaced folder {trash}: {e}"
+        if output_manager:
+            output_manager.print_warning(warning_msg)
+        else:
+            print(f"⚠️  {warning_msg}")
+
+def wait_for_trash():
+    """Wait until every replaced folder queued for deletion is gone"""
+    while _trash_futures:
+        _trash_futures.pop().result()
+
+class ActionRunner:
+    """Runs flatten actions on a thread pool
+
+    Actions are grouped into batches (one per subfolder) that execute in order
+    on a worker thread, while separate batches run concurrently. Renames
+    release the GIL, so the syscalls overlap. Paths touched by unfinished
+    batches are tracked so the planner can ``settle`` before inspecting them,
+    which keeps every decision identical to a serial run.
+    """
+
+    def __init__(self, output_manager, known_dirs, max_workers=None):
+        self.output = output_manager
+        self.known_dirs = known_dirs
+        from concurrent.futures import ThreadPoolExecutor
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or min(32, (os.cpu_count() or 1) * 4))
+        self._batch = []
+        self._futures = []
+        self._in_flight = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add(self, action_type, src, dst, trash=None):
+        """Queue an action on the current batch"""
+        self._batch.append((action_type, src, dst, trash))
+        # Both ends change, and so do the listings of the folders holding them
+        for path in (src, dst):
+            if path is not None:
+                self._in_flight.add(path)
+                self._in_flight.add(os.path.dirname(path))
+
+    def touches(self, path):
+        """Whether a queued or running action will change ``path``"""
+        return os.fspath(path) in self._in_flight
+
+    def flush(self):
+        """Submit the current batch to the pool"""
+        if self._batch:
+            self._futures.append(self._executor.submit(self._run_batch, self._batch))
+            self._batch = []
+
+    def settle(self):
+        """Run everything queued so far and wait for it to finish"""
+        self.flush()
+        for future in self._futures:
+            future.result()
+        self._futures.clear()
+        self._in_flight.clear()
+
+    def close(self):
+        self.settle()
+        self._executor.shutdown()
+
+    def _run_batch(self, batch):
+        for action_type, src, dst, trash in batch:
+            execute_action(action_type, src, dst, self.output, self.known_dirs, trash)
+
+class LogWriter:
+    """Streams a LevelZap log to disk as actions are recorded
+
+    Entries are written one per line as they are appended, so the full action
+    history is never held in memory. The result is still a single JSON
+    document, sealed with a hash over every byte written before it::
+
+        {"meta": {...},
+        "actions": [
+        {...},
+        {...}
+        ],
+        "hash": "<hash of everything before this line>"}
+
+    Since the hash covers the bytes exactly as stored, verifying a log never
+    requires re-serializing it (see ``read_log``). Rather than a wall-clock
+    timestamp per action, each entry records ``elapsed_ns`` since the run
+    started; ``meta["log_timestamp"]`` holds the start time.
+    """
+
+    def __init__(self, log_path, meta):
+        self.path = log_path
+        self._hasher = hashlib.new(LOG_HASH_ALGORITHM)
+        self._count = 0
+        self._started = time.monotonic_ns()
+        self._file = open(log_path, "wb", buffering=1024 * 1024)
+        header = dict(meta, log_format=LOG_FORMAT_VERSION, hash_algo=LOG_HASH_ALGORITHM)
+        self._write(b'{"meta": ' + _dumps(header) + b',\n"actions": [')
+
+    def __enter__(self):
+        return self
 
-def resolve_duplicate_file(existing_path: Path, new_path: Path, strategy: str, output_manager=None) -> Path:
+    def __exit__(self, exc_type, exc, tb):
+        # Seal the log even if the operation failed part way, so whatever was
+        # done can still be reverted
+        self.close()
+
+    def _write(self, data):
+        self._file.write(data)
+        self._hasher.update(data)
+
+    def append(self, entry):
+        """Write a single action entry"""
+        entry["elapsed_ns"] = time.monotonic_ns() - self._started
+        self._write((b",\n" if self._count else b"\n") + _dumps(entry))
+        self._count += 1
+
+    def close(self):
+        """Finish the actions array and write the integrity hash"""
+        if self._file.closed:
+            return
+        self._write(b"\n]" if self._count else b"]")
+        self._file.write(LOG_HASH_MARKER + self._hasher.hexdigest().encode("ascii") + b'"}\n')
+        self._file.close()
+
+def _legacy_log_hash(log_data):
+    """Hash a log written before LOG_FORMAT_VERSION 2 (hash stored in meta)"""
+    meta_copy = dict(log_data.get("meta", {}))
+    meta_copy.pop("hash", None)
+    data_for_hash = {
+        "meta": meta_copy,
+        "actions": log_data.get("actions", [])
+    }
+    return hashlib.sha256(json.dumps(data_for_hash, indent=2).encode("utf-8")).hexdigest()
+
+def _log_hasher(meta):
+    """Return a fresh hasher for the algorithm a current log was sealed with"""
+    return hashlib.new(meta.get("hash_algo", "sha256"))
+
+def read_log(log_path):
+    """Load a log file and check its integrity
+
+    Returns a ``(log_data, intact)`` tuple. Current logs are verified against
+    the raw bytes on disk; older logs are re-serialized the way they were
+    originally hashed.
+    """
+    with open(log_path, "rb") as f:
+        raw = f.read()
+    log_data = _loads(raw)
+    if "hash" in log_data:
+        marker = raw.rfind(LOG_HASH_MARKER)
+        hasher = _log_hasher(log_data.get("meta", {}))
+        hasher.update(raw[:marker])
+        intact = marker != -1 and hasher.hexdigest() == log_data["hash"]
+    else:
+        intact = log_data.get("meta", {}).get("hash") == _legacy_log_hash(log_data)
+    return log_data, intact
+
+class LogReader:
+    """Reads a LevelZap log without loading its whole action history
+
+    For current logs the header line is parsed on its own, the hash is
+    checked over the file in ``LOG_READ_CHUNK`` blocks, and actions are
+    decoded one line at a time, newest first, from a memory map. Logs older
+    than LOG_FORMAT_VERSION 2 are loaded whole through ``read_log``.
+    """
+
+    def __init__(self, log_path):
+        self.path = log_path
+        self.meta = {}
+        self.intact = False
+        self.count = 0
+        self._legacy_actions = None
+        self._map = None
+        self._file = open(log_path, "rb")
+        try:
+            self._open()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open(self):
+        prefix = b'{"meta": '
+        first = self._file.readline()
+        meta = _loads(first[len(prefix):].rstrip(b",\r\n")) if first.startswith(prefix) else {}
+        if "log_format" not in meta:
+            log_data, self.intact = read_log(self.path)
+            self.meta = log_data.get("meta", {})
+            self._legacy_actions = log_data.get("actions", [])
+            self.count = len(self._legacy_actions)
+            return
+        self.meta = meta
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._marker = self._map.rfind(LOG_HASH_MARKER)
+        if self._marker == -1:
+            return
+        stored = self._map[self._marker + len(LOG_HASH_MARKER):].split(b'"', 1)[0]
+        hasher = _log_hasher(meta)
+        newlines = 0
+        for start in range(0, self._marker, LOG_READ_CHUNK):
+            block = self._map[start:min(start + LOG_READ_CHUNK, self._marker)]
+            hasher.update(block)
+            newlines += block.count(b"\n")
+        self.intact = hasher.hexdigest().encode("ascii") == stored
+        # One newline ends the header, one precedes each action and one the
+        # closing bracket; string values never contain a raw newline
+        self.count = max(newlines - 2, 0)
+
+    def reversed_actions(self, on_error=None):
+        """Yield the logged actions from last to first
+
+        A line that cannot be decoded is passed to ``on_error`` as its line
+        number and the exception, and skipped; without ``on_error`` the
+        exception propagates.
+        """
+        if self._legacy_actions is not None:
+            yield from reversed(self._legacy_actions)
+            return
+        if self._marker == -1:
+            return
+        start = self._map.find(b"[") + 1
+        end = self._map.rfind(b"]", start, self._marker)
+        while True:
+            newline = self._map.rfind(b"\n", start, end)
+            if newline == -1:
+                break
+            line = self._map[newline + 1:end].rstrip(b",")
+            if line:
+                try:
+                    action = _loads(line)
+                except ValueError as e:
+                    if on_error is None:
+                        raise
+                    on_error(self._map[:newline].count(b"\n") + 2, e)
+                else:
+                    yield action
+            end = newline
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+def get_log_filename(started=None):
+    epoch_seconds = int((started or datetime.now()).timestamp())
+    return f"{LOG_PREFIX}{epoch_seconds}{LOG_SUFFIX}"
+
+def find_log_files(folder: Path, newest_first=False):
+    """Return the log files in ``folder``, oldest first unless ``newest_first``
+
+    Found with one directory scan. Logs are ordered by the epoch in their
+    name, then by modification time for runs started within the same second.
+    """
+    found = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            name = entry.name
+            if name.startswith(LOG_PREFIX) and name.endswith(LOG_SUFFIX) and entry.is_file():
+                epoch = name[len(LOG_PREFIX):-len(LOG_SUFFIX)]
+                found.append((int(epoch) if epoch.isdigit() else 0, entry.stat().st_mtime_ns, name, entry.path))
+    found.sort(reverse=newest_first)
+    return [Path(path) for *_, path in found]
+
+# Sort keys for the keep-one duplicate strategies: the file with the
+# smallest key wins, and ties go to the file seen first
+DUPLICATE_KEYS = {
+    "newest": lambda st: -st.st_mtime,
+    "oldest": lambda st: st.st_mtime,
+    "largest": lambda st: -st.st_size,
+    "smallest": lambda st: st.st_size,
+}
+
+def resolve_duplicate_file(existing_path: Path, new_path: Path, strategy: str, output_manager=None, names=None) -> Path:
     """Resolve duplicate files based on the specified strategy"""
     if strategy == "overwrite":
         return new_path  # Use new file, will overwrite existing
     elif strategy == "rename":
-        return resolve_conflict_path(existing_path, None)  # Rename the new file
-    elif strategy in ["newest", "oldest", "largest", "smallest"]:
+        return resolve_conflict_path(existing_path, names=names)  # Rename the new file
+    elif strategy in DUPLICATE_KEYS:
+        key = DUPLICATE_KEYS[strategy]
         try:
-            existing_stat = existing_path.stat()
-            new_stat = new_path.stat()
-            
-            if strategy == "newest":
-                keep_existing = existing_stat.st_mtime >= new_stat.st_mtime
-            elif strategy == "oldest":
-                keep_existing = existing_stat.st_mtime <= new_stat.st_mtime
-            elif strategy == "largest":
-                keep_existing = existing_stat.st_size >= new_stat.st_size
-            elif strategy == "smallest":
-                keep_existing = existing_stat.st_size <= new_stat.st_size
+            keep_existing = key(existing_path.stat()) <= key(new_path.stat())
             
             if keep_existing:
                 # Keep existing, don't move new file (return None to indicate skip)
@@ -291,207 +971,300 @@ def resolve_duplicate_file(existing_path: Path, new_path: Path, strategy: str, o
         except OSError as e:
             if output_manager:
                 output_manager.print_warning(f"Could not compare files, falling back to rename: {e}")
-            return resolve_conflict_path(existing_path, None)
+            return resolve_conflict_path(existing_path, names=names)
     
     # Fallback to rename strategy
-    return resolve_conflict_path(existing_path, None)
+    return resolve_conflict_path(existing_path, names=names)
+
+def _scan_folder(folder):
+    """List a folder's entries, returning the OSError instead of raising it"""
+    try:
+        with os.scandir(folder.path) as it:
+            return list(it)
+    except OSError as e:
+        return e
+
+def _scan_tree(root):
+    """Collect the files and folders below root as path strings
+
+    Entries are classified from the directory read, so no extra ``stat``
+    calls are made, and symlinked folders are not descended into. Files come
+    out in the same order ``rglob`` yields them: each folder's own files
+    before those of its subfolders. Folders come out deepest first, ready
+    to be removed in order. Folders that cannot be listed are skipped.
+    """
+    files = []
+    dirs_by_depth = []
+    stack = [(os.fspath(root), 0)]
+    while stack:
+        folder, depth = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file():
+                            files.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        if subdirs:
+            if depth == len(dirs_by_depth):
+                dirs_by_depth.append([])
+            dirs_by_depth[depth].extend(subdirs)
+            stack.extend((path, depth + 1) for path in reversed(subdirs))
+    return files, [path for level in reversed(dirs_by_depth) for path in level]
 
 def flatten_folder(root: Path, simulate=False, merge=False, overwrite=False, recurse=False, duplicate_strategy="rename", output_manager=None):
     """Flatten subfolders with improved error handling and output management"""
+    from tqdm import tqdm
     if output_manager is None:
         output_manager = OutputManager()
     
     try:
-        log_file = get_log_filename()
-        actions = []
+        # One clock read names the log and stamps it; actions carry offsets
+        started = datetime.now()
+        log_path = root / get_log_filename(started)
+        # Every destination lives in root (or an existing folder being merged
+        # into), so its parent never needs to be created
+        known_dirs = {os.fspath(root)}
         
         if recurse:
             # Collect all files from all subdirectories recursively
-            all_files = []
-            all_folders_to_delete = set()
-            
-            for item in root.rglob('*'):
-                if item.is_file():
-                    all_files.append(item)
-                elif item.is_dir() and item != root:
-                    all_folders_to_delete.add(item)
+            all_files, all_folders_to_delete = _scan_tree(root)
             
             total_items = len(all_files)
             operation_type = "recursive flatten"
         else:
             # Original behavior: only flatten immediate subfolders
-            subfolders = [f for f in root.iterdir() if f.is_dir()]
-            total_items = sum(len(list(f.iterdir())) for f in subfolders)
+            with os.scandir(root) as it:
+                subfolders = [entry for entry in it if entry.is_dir(follow_symlinks=False)]
+            # Read each subfolder exactly once; the cached listings drive both
+            # the progress total and the move loop below. Directory reads
+            # release the GIL, so many subfolders are listed concurrently
+            folder_listings = []
+            total_items = 0
+            with contextlib.ExitStack() as stack:
+                if len(subfolders) > PARALLEL_MIN_SUBFOLDERS:
+                    from concurrent.futures import ThreadPoolExecutor
+                    listings = stack.enter_context(ThreadPoolExecutor()).map(_scan_folder, subfolders)
+                else:
+                    listings = map(_scan_folder, subfolders)
+                for folder, items in zip(subfolders, listings):
+                    if isinstance(items, OSError):
+                        output_manager.print_error(f"Error processing folder {folder.path}: {items}")
+                        continue
+                    folder_listings.append((folder, items))
+                    total_items += len(items)
             operation_type = "flatten"
         
         output_manager.print_operation_start(operation_type, 
                                            len(all_files) if recurse else len(subfolders) if not recurse else 0, 
                                            root, simulate)
         
-        with tqdm(total=total_items, desc="Flattening", unit="item") as pbar:
+        meta = {
+            "version": LEVELZAP_VERSION,
+            "log_timestamp": started.isoformat(),
+            "simulated": simulate,
+            "recursive": recurse,
+            "duplicate_strategy": duplicate_strategy
+        }
+        # Renames within different subfolders are independent, so large
+        # flattens hand them to worker threads
+        use_threads = not simulate and not recurse and len(subfolders) > PARALLEL_MIN_SUBFOLDERS
+        runner_context = ActionRunner(output_manager, known_dirs) if use_threads else contextlib.nullcontext()
+        with LogWriter(log_path, meta) as log, runner_context as runner, tqdm(total=total_items, desc="Flattening", unit="item", disable=None) as pbar:
+            names = NameCache(runner, simulate)
             if recurse:
                 # Group files by their destination names to detect conflicts
                 files_by_destination = {}
-                simulated_destinations = set()  # Track simulated file destinations
+                basename = os.path.basename
+                root_str = os.fspath(root)
                 
+                group = files_by_destination.setdefault
                 for file_path in all_files:
-                    dest_name = file_path.name
-                    if dest_name not in files_by_destination:
-                        files_by_destination[dest_name] = []
-                    files_by_destination[dest_name].append(file_path)
+                    group(basename(file_path), []).append(file_path)
                 
                 # Process each group of files with the same destination name
                 for dest_name, files_list in files_by_destination.items():
-                    destination = root / dest_name
+                    destination = os.path.join(root_str, dest_name)
                     
                     if len(files_list) == 1:
                         # No conflict, single file with this name
                         file_path = files_list[0]
-                        if destination.exists() and destination != file_path:
+                        if file_path == destination:
+                            # Already in root; nothing to move
+                            pass
+                        elif names.exists(destination):
                             # Conflict with existing file in root
-                            resolved_dest = resolve_duplicate_file(destination, file_path, duplicate_strategy, output_manager)
+                            if duplicate_strategy == "overwrite":
+                                # The destination is fixed; no name to resolve
+                                perform_action(simulate, "overwrite_file", src=file_path, dst=destination, log=log, output_manager=output_manager, names=names)
+                                pbar.update(1)
+                                continue
+                            resolved_dest = resolve_duplicate_file(Path(destination), Path(file_path), duplicate_strategy, output_manager, names)
                             if resolved_dest is None:
                                 # Skip this file (keep existing)
                                 pbar.update(1)
                                 continue
-                            elif resolved_dest == destination and duplicate_strategy == "overwrite":
-                                perform_action(simulate, "overwrite_file", src=file_path, dst=destination, log=actions, output_manager=output_manager)
                             else:
                                 # Move with new name
-                                perform_action(simulate, "move_renamed", src=file_path, dst=resolved_dest, log=actions, 
-                                             extra={"original_conflict": str(destination), "strategy": duplicate_strategy}, output_manager=output_manager)
+                                perform_action(simulate, "move_renamed", src=file_path, dst=resolved_dest, log=log, 
+                                             extra={"original_conflict": destination, "strategy": duplicate_strategy}, known_dirs=known_dirs, output_manager=output_manager, names=names)
                         else:
                             # No conflict, regular move
-                            perform_action(simulate, "move", src=file_path, dst=destination, log=actions, output_manager=output_manager)
-                            simulated_destinations.add(str(destination))
+                            perform_action(simulate, "move", src=file_path, dst=destination, log=log, known_dirs=known_dirs, output_manager=output_manager, names=names)
                         pbar.update(1)
                     else:
                         # Multiple files with same name - handle conflicts
-                        if duplicate_strategy in ["newest", "oldest", "largest", "smallest"]:
-                            # Choose the best file based on strategy
+                        if duplicate_strategy in DUPLICATE_KEYS:
+                            # Choose the best file based on strategy, stat-ing
+                            # each candidate once
+                            key = DUPLICATE_KEYS[duplicate_strategy]
                             best_file = files_list[0]
-                            for file_path in files_list[1:]:
-                                try:
-                                    best_stat = best_file.stat()
-                                    curr_stat = file_path.stat()
-                                    
-                                    if duplicate_strategy == "newest":
-                                        if curr_stat.st_mtime > best_stat.st_mtime:
-                                            best_file = file_path
-                                    elif duplicate_strategy == "oldest":
-                                        if curr_stat.st_mtime < best_stat.st_mtime:
-                                            best_file = file_path
-                                    elif duplicate_strategy == "largest":
-                                        if curr_stat.st_size > best_stat.st_size:
-                                            best_file = file_path
-                                    elif duplicate_strategy == "smallest":
-                                        if curr_stat.st_size < best_stat.st_size:
-                                            best_file = file_path
-                                except OSError:
-                                    # If we can't stat, keep current best
-                                    continue
+                            try:
+                                best_key = key(os.stat(best_file))
+                            except OSError:
+                                # Nothing can be compared against the first file
+                                best_key = None
+                            if best_key is not None:
+                                for file_path in files_list[1:]:
+                                    try:
+                                        curr_key = key(os.stat(file_path))
+                                    except OSError:
+                                        # If we can't stat, keep current best
+                                        continue
+                                    if curr_key < best_key:
+                                        best_file, best_key = file_path, curr_key
                             
-                            # Move the best file
-                            perform_action(simulate, "move", src=best_file, dst=destination, log=actions, 
-                                         extra={"strategy": duplicate_strategy, "chosen_from": [str(f) for f in files_list]}, 
-                                         output_manager=output_manager)
-                            simulated_destinations.add(str(destination))
+                            # Move the best file, unless it is already in root
+                            if best_file != destination:
+                                perform_action(simulate, "move", src=best_file, dst=destination, log=log, 
+                                             extra={"strategy": duplicate_strategy, "chosen_from": files_list}, 
+                                             known_dirs=known_dirs, output_manager=output_manager, names=names)
                             pbar.update(len(files_list))
                         else:
                             # Rename strategy or overwrite - move first file normally, rename others
-                            perform_action(simulate, "move", src=files_list[0], dst=destination, log=actions, output_manager=output_manager)
-                            simulated_destinations.add(str(destination))
+                            if files_list[0] != destination:
+                                perform_action(simulate, "move", src=files_list[0], dst=destination, log=log, known_dirs=known_dirs, output_manager=output_manager, names=names)
                             
                             for file_path in files_list[1:]:
                                 if duplicate_strategy == "overwrite":
-                                    perform_action(simulate, "overwrite_file", src=file_path, dst=destination, log=actions, output_manager=output_manager)
+                                    perform_action(simulate, "overwrite_file", src=file_path, dst=destination, log=log, output_manager=output_manager, names=names)
                                 else:
                                     # Rename strategy
-                                    renamed_dest = resolve_conflict_path(destination, simulated_destinations)
-                                    perform_action(simulate, "move_renamed", src=file_path, dst=renamed_dest, log=actions,
-                                                 extra={"original_conflict": str(destination), "strategy": duplicate_strategy}, 
-                                                 output_manager=output_manager)
-                                    simulated_destinations.add(str(renamed_dest))
+                                    renamed_dest = resolve_conflict_path(Path(destination), names=names)
+                                    perform_action(simulate, "move_renamed", src=file_path, dst=renamed_dest, log=log,
+                                                 extra={"original_conflict": destination, "strategy": duplicate_strategy}, 
+                                                 known_dirs=known_dirs, output_manager=output_manager, names=names)
                             pbar.update(len(files_list))
                 
                 # Delete all empty folders in reverse order (deepest first)
-                sorted_folders = sorted(all_folders_to_delete, key=lambda x: len(x.parts), reverse=True)
-                for folder in sorted_folders:
+                for folder in all_folders_to_delete:
                     try:
-                        if folder.exists():  # Check if still exists (may have been deleted already)
-                            perform_action(simulate, "delete_folder", src=folder, log=actions, output_manager=output_manager)
+                        if os.path.exists(folder):  # Check if still exists (may have been deleted already)
+                            perform_action(simulate, "delete_folder", src=folder, log=log, output_manager=output_manager, names=names)
                     except Exception as e:
                         output_manager.print_error(f"Error deleting folder {folder}: {e}")
                         continue
                         
             else:
-                # Original non-recursive behavior
-                subfolders = [f for f in root.iterdir() if f.is_dir()]
-                for folder in subfolders:
+                # Original non-recursive behavior. Everything the per-entry
+                # loop calls is bound to a local name up front
+                exists = names.exists
+                join = os.path.join
+                update = pbar.update
+
+                # Work on the plain strings scandir already built; Path objects
+                # are only made for the rare conflicts that need renaming
+                root_str = os.fspath(root)
+                root_prefix = join(root_str, "")
+                # Subfolders not processed yet, and those of them an earlier
+                # merge or overwrite has written into; the cached listing of
+                # a written folder is stale and is read again
+                pending = {_name_key(folder.path) for folder, _ in folder_listings}
+                written = set()
+
+                def act(action_type, src, dst=None, extra=None):
+                    if dst is not None and dst.startswith(root_prefix):
+                        top = _name_key(join(root_str, dst[len(root_prefix):].split(os.sep, 1)[0]))
+                        if top in pending:
+                            written.add(top)
+                    # Positional forwarding is cheaper than repeating keywords
+                    perform_action(simulate, action_type, src, dst, log, extra, output_manager, known_dirs, runner, names)
+
+                def resolve(path):
+                    return os.fspath(resolve_conflict_path(Path(path), names=names))
+
+                for folder, items in folder_listings:
+                    key = _name_key(folder.path)
+                    pending.discard(key)
+                    if runner is not None and runner.touches(folder.path):
+                        # An earlier subfolder moved something into this one
+                        runner.settle()
+                    if key in written:
+                        rescanned = _scan_folder(folder)
+                        # The bar was sized from the stale listing
+                        pbar.total += (0 if isinstance(rescanned, OSError) else len(rescanned)) - len(items)
+                        pbar.refresh()
+                        items = rescanned
+                        if isinstance(items, OSError):
+                            output_manager.print_error(f"Error processing folder {folder.path}: {items}")
+                            continue
+                    if not items:
+                        # Nothing to move out; the folder only needs removing
+                        act("delete_folder", src=folder.path)
+                        continue
                     try:
-                        for item in folder.iterdir():
-                            destination = root / item.name
-                            if destination.exists():
-                                if destination.is_dir() and item.is_dir():
+                        for done, item in enumerate(items, 1):
+                            if not done % PROGRESS_BATCH:
+                                update(PROGRESS_BATCH)
+                            item_path = item.path
+                            destination = join(root_str, item.name)
+                            if exists(destination):
+                                if names.is_dir(destination) and item.is_dir(follow_symlinks=False):
                                     if merge:
-                                        for subitem in item.iterdir():
-                                            dest_sub = destination / subitem.name
-                                            if dest_sub.exists():
+                                        with os.scandir(item.path) as it:
+                                            subitems = list(it)
+                                        for subitem in subitems:
+                                            subitem_path = subitem.path
+                                            dest_sub = join(destination, subitem.name)
+                                            if exists(dest_sub):
                                                 if overwrite:
-                                                    perform_action(simulate, "overwrite_file", src=subitem, dst=dest_sub, log=actions, output_manager=output_manager)
-                                                    pbar.update(1)
+                                                    act("overwrite_file", src=subitem_path, dst=dest_sub)
                                                     continue
                                                 else:
-                                                    dest_sub = resolve_conflict_path(dest_sub)
-                                            perform_action(simulate, "move", src=subitem, dst=dest_sub, log=actions, output_manager=output_manager)
-                                            pbar.update(1)
-                                        perform_action(simulate, "delete_folder", src=item, log=actions, output_manager=output_manager)
+                                                    dest_sub = resolve(dest_sub)
+                                            act("move", src=subitem_path, dst=dest_sub)
+                                        act("delete_folder", src=item_path)
                                         continue
                                     elif overwrite:
-                                        perform_action(simulate, "overwrite_folder", src=item, dst=destination, log=actions, output_manager=output_manager)
-                                        pbar.update(1)
+                                        act("overwrite_folder", src=item_path, dst=destination)
                                         continue
                                     else:
-                                        destination = resolve_conflict_path(destination, None)
-                                elif destination.is_file() or item.is_file():
+                                        destination = resolve(destination)
+                                else:
                                     if overwrite:
-                                        perform_action(simulate, "overwrite_file", src=item, dst=destination, log=actions, output_manager=output_manager)
-                                        pbar.update(1)
+                                        act("overwrite_file", src=item_path, dst=destination)
                                         continue
                                     else:
-                                        new_path = resolve_conflict_path(destination, None)
-                                        perform_action(simulate, "move_renamed", src=item, dst=new_path, log=actions, extra={"original_conflict": str(destination)}, output_manager=output_manager)
-                                        pbar.update(1)
+                                        new_path = resolve(destination)
+                                        act("move_renamed", src=item_path, dst=new_path, extra={"original_conflict": destination})
                                         continue
-                            perform_action(simulate, "move", src=item, dst=destination, log=actions, output_manager=output_manager)
-                            pbar.update(1)
-                        perform_action(simulate, "delete_folder", src=folder, log=actions, output_manager=output_manager)
+                            act("move", src=item_path, dst=destination)
+                        update(len(items) % PROGRESS_BATCH)
+                        act("delete_folder", src=folder.path)
+                        if runner is not None:
+                            runner.flush()
                     except Exception as e:
-                        output_manager.print_error(f"Error processing folder {folder}: {e}")
+                        output_manager.print_error(f"Error processing folder {folder.path}: {e}")
                         continue
         
-        # Write log file
-        log_path = root / log_file
-        try:
-            with open(log_path, "w", encoding="utf-8") as f:
-                meta = {
-                    "version": LEVELZAP_VERSION,
-                    "log_timestamp": datetime.now().isoformat(),
-                    "simulated": simulate,
-                    "recursive": recurse,
-                    "duplicate_strategy": duplicate_strategy
-                }
-                log_data = {
-                    "meta": meta,
-                    "actions": actions
-                }
-                raw_log = json.dumps(log_data, indent=2).encode("utf-8")
-                log_data["meta"]["hash"] = hashlib.sha256(raw_log).hexdigest()
-                f.write(json.dumps(log_data, indent=2))
-            
-            output_manager.print_log_completion(log_path, simulate)
-        except Exception as e:
-            output_manager.print_error(f"Failed to write log file: {e}")
+        wait_for_trash()
+        output_manager.print_log_completion(log_path, simulate)
     
     except Exception as e:
         if output_manager:
@@ -500,81 +1273,124 @@ def flatten_folder(root: Path, simulate=False, merge=False, overwrite=False, rec
             print(f"❌ Fatal error: {e}")
         sys.exit(1)
 
+def mark_log_reverted(log_path: Path):
+    """Record in a kept log file that it has been reverted
+
+    Current logs (those with ``log_format`` in their header) end with their
+    hash, so the ``reverted`` field is written after it in place, replacing
+    any earlier one, and the hashed bytes are left untouched. Older logs
+    are rewritten whole through a temporary file that replaces the original
+    atomically.
+    """
+    reverted = _dumps({"timestamp": datetime.now().isoformat()})
+    with open(log_path, "rb+") as f:
+        prefix = b'{"meta": '
+        first = f.readline()
+        meta = _loads(first[len(prefix):].rstrip(b",\r\n")) if first.startswith(prefix) else {}
+        if "log_format" in meta:
+            size = f.seek(0, os.SEEK_END)
+            # The trailer holds only the hash and at most one reverted field
+            start = f.seek(max(size - 4096, 0))
+            tail = f.read()
+            marker = tail.rfind(LOG_HASH_MARKER)
+            hash_end = tail.find(b'"', marker + len(LOG_HASH_MARKER)) if marker != -1 else -1
+            if hash_end == -1:
+                raise ValueError("log has no hash trailer")
+            f.seek(start + hash_end + 1)
+            f.write(b',\n"reverted": ' + reverted + b"}\n")
+            f.truncate()
+            return
+    log_data = _loads(log_path.read_bytes())
+    log_data["reverted"] = _loads(reverted)
+    tmp_path = log_path.with_name(log_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_dumps(log_data) + b"\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, log_path)
+
 def revert_log(log_path: Path, keep_log=False, output_manager=None):
     """Revert operations from a log file with improved error handling"""
+    from tqdm import tqdm
     if output_manager is None:
         output_manager = OutputManager()
     
     output_manager.print_info(f"♻️  Reverting changes using log: {log_path}\n")
     
     try:
-        with open(log_path, "r", encoding="utf-8") as f:
-            log_data = json.load(f)
-        
-        if log_data.get("meta", {}).get("simulated"):
+        reader = LogReader(log_path)
+    except Exception as e:
+        output_manager.print_error(f"Failed to read log file: {e}")
+        return
+    
+    # Actions are undone straight from the file, newest first; the reader is
+    # closed before the log is updated or removed
+    with reader:
+        if reader.meta.get("simulated"):
             output_manager.print_error("Cannot revert a simulated log file.")
             return
         
-        stored_hash = log_data.get("meta", {}).get("hash")
-        meta_copy = dict(log_data.get("meta", {}))
-        meta_copy.pop("hash", None)
-        data_for_hash = {
-            "meta": meta_copy,
-            "actions": log_data.get("actions", [])
-        }
-        computed_hash = hashlib.sha256(json.dumps(data_for_hash, indent=2).encode("utf-8")).hexdigest()
-        
-        if stored_hash != computed_hash:
+        if not reader.intact:
             output_manager.print_error("Log file integrity check failed. Possible modification detected.")
             return
         else:
             output_manager.print_success("Log file passed integrity check.")
         
-        actions = log_data.get("actions", [])
-    except Exception as e:
-        output_manager.print_error(f"Failed to read log file: {e}")
-        return
-    
-    actions.reverse()
-    for action in tqdm(actions, desc="Reverting", unit="step"):
-        try:
-            act_type = action["action"]
-            if act_type == "move":
-                src = Path(action["destination"])
-                dst = Path(action["source"])
-                if src.exists():
-                    dst.parent.mkdir(parents=True, exist_ok=True)
-                    src.rename(dst)
-            elif act_type == "move_renamed":
-                src = Path(action["destination"])
-                dst = Path(action["source"])
-                if src.exists():
-                    dst.parent.mkdir(parents=True, exist_ok=True)
-                    src.rename(dst)
-            elif act_type == "delete_folder":
-                path = Path(action["source"])
-                path.mkdir(parents=True, exist_ok=True)
-            elif act_type == "delete_empty_folder":
-                path = Path(action["source"])
-                path.mkdir(parents=True, exist_ok=True)
-            elif act_type == "delete_zero_file":
-                # Cannot restore content of zero-byte file, but create empty file
-                path = Path(action["source"])
-                path.parent.mkdir(parents=True, exist_ok=True)
-                path.touch()
-            elif act_type.startswith("overwrite"):
-                output_manager.print_warning(f"Cannot revert overwrite: {action.get('source', 'unknown')}")
+        # Folders already created or restored, so each parent is made once
+        made_dirs = set()
+        
+        def ensure_dir(folder):
+            if folder not in made_dirs:
+                os.makedirs(folder, exist_ok=True)
+                made_dirs.add(folder)
+        
+        skipped = []
+        
+        def skip_line(line_number, error):
+            skipped.append(line_number)
+            output_manager.print_error(f"Skipping unreadable log entry on line {line_number}: {error}")
+        
+        for action in tqdm(reader.reversed_actions(skip_line), total=reader.count, desc="Reverting", unit="step", disable=None):
+            try:
+                act_type = action["action"]
+                if act_type in ("move", "move_renamed"):
+                    src = action["destination"]
+                    dst = action["source"]
+                    if os.path.exists(src):
+                        ensure_dir(os.path.dirname(dst))
+                        os.rename(src, dst)
+                elif act_type in ("delete_folder", "delete_empty_folder"):
+                    ensure_dir(action["source"])
+                elif act_type == "delete_zero_file":
+                    # Cannot restore content of zero-byte file, but create empty file
+                    path = action["source"]
+                    ensure_dir(os.path.dirname(path))
+                    open(path, "ab").close()
+                elif act_type == "overwrite_folder" and action.get("trash_path") and os.path.isdir(action["trash_path"]):
+                    # The replaced folder was not deleted yet (interrupted run), so
+                    # the overwrite can be undone
+                    src = action["destination"]
+                    dst = action["source"]
+                    ensure_dir(os.path.dirname(dst))
+                    os.rename(src, dst)
+                    os.rename(action["trash_path"], src)
+                    # Folders under either tree have moved
+                    made_dirs.clear()
+                elif act_type.startswith("overwrite"):
+                    output_manager.print_warning(f"Cannot revert overwrite: {action.get('source', 'unknown')}")
+                    continue
+            except Exception as e:
+                output_manager.print_error(f"Error reverting action {act_type}: {e}")
                 continue
-        except Exception as e:
-            output_manager.print_error(f"Error reverting action {act_type}: {e}")
-            continue
+    
+    if skipped:
+        # The log is still the only record of the entries not undone
+        output_manager.print_error(f"Revert incomplete: {len(skipped)} log entries could not be read. The log was kept.")
+        return
     
     try:
         if keep_log:
-            with open(log_path, "r+", encoding="utf-8") as f:
-                actions = json.load(f)
-                f.seek(0)
-                json.dump(actions + [{"reverted": True, "timestamp": datetime.now().isoformat()}], f, indent=2)
+            mark_log_reverted(log_path)
         else:
             log_path.unlink()
         output_manager.print_success("Revert completed.")
@@ -587,7 +1403,7 @@ def revert_all_logs(folder: Path, keep_logs=False, output_manager=None):
         output_manager = OutputManager()
     
     try:
-        log_files = sorted(folder.glob("levelzap.log.*.json"), reverse=True)
+        log_files = find_log_files(folder, newest_first=True)
         if not log_files:
             output_manager.print_error("No log files found to revert.")
             return
@@ -597,35 +1413,88 @@ def revert_all_logs(folder: Path, keep_logs=False, output_manager=None):
     except Exception as e:
         output_manager.print_error(f"Error reverting logs: {e}")
 
+def _map_logs(func, log_files):
+    """Yield ``func(log_file)`` for each log, in order
+
+    Logs are independent and hashing releases the GIL, so when there are
+    several they are processed on a small thread pool.
+    """
+    if len(log_files) < 2:
+        yield from map(func, log_files)
+        return
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(8, len(log_files))) as pool:
+        yield from pool.map(func, log_files)
+
+def _check_log(log_file):
+    """Check one log's hash, returning ``(meta, intact, error)``
+
+    Only the header line is parsed; the actions are hashed as raw bytes and
+    never decoded.
+    """
+    try:
+        with LogReader(log_file) as reader:
+            return reader.meta, reader.intact, None
+    except Exception as e:
+        return {}, False, e
+
+def _cached_log_checks(log_files):
+    """Return ``_check_log`` results for log_files, reusing earlier ones
+
+    Results are remembered per log together with its size, mtime and ctime;
+    a log whose stat still matches is not read again. Editing a log, or
+    marking it reverted, changes its ctime, so it is checked afresh.
+    """
+    cache_path = _cache_dir() / "verified.json"
+    try:
+        cache = _loads(cache_path.read_bytes())
+    except (OSError, ValueError):
+        cache = {}
+    results = {}
+    stamps = {}
+    for log_file in log_files:
+        key = os.path.abspath(log_file)
+        try:
+            st = os.stat(log_file)
+        except OSError:
+            continue
+        stamps[key] = [st.st_size, st.st_mtime_ns, st.st_ctime_ns]
+        hit = cache.get(key)
+        if hit is not None and hit[:3] == stamps[key]:
+            results[key] = (hit[4], hit[3], None)
+    misses = [log_file for log_file in log_files if os.path.abspath(log_file) not in results]
+    for log_file, result in zip(misses, _map_logs(_check_log, misses)):
+        key = os.path.abspath(log_file)
+        results[key] = result
+        meta, intact, error = result
+        if error is None and key in stamps:
+            cache[key] = stamps[key] + [intact, meta]
+    if misses:
+        # Forget logs that have gone from the folders just listed
+        folders = {os.path.dirname(key) for key in results}
+        for key in [key for key in cache if os.path.dirname(key) in folders and key not in results]:
+            del cache[key]
+        _write_cache(cache_path, cache)
+    return [results[os.path.abspath(log_file)] for log_file in log_files]
+
 def verify_all_logs(folder: Path, output_manager=None):
     """Verify integrity of all log files with error handling"""
     if output_manager is None:
         output_manager = OutputManager()
     
     try:
-        log_files = sorted(folder.glob("levelzap.log.*.json"))
+        log_files = find_log_files(folder)
         if not log_files:
             output_manager.print_error("No log files found to verify.")
             return
 
-        for log_file in log_files:
-            try:
-                with open(log_file, "r", encoding="utf-8") as f:
-                    log_data = json.load(f)
-                stored_hash = log_data.get("meta", {}).get("hash")
-                meta_copy = dict(log_data.get("meta", {}))
-                meta_copy.pop("hash", None)
-                temp_data = {
-                    "meta": meta_copy,
-                    "actions": log_data.get("actions", [])
-                }
-                computed_hash = hashlib.sha256(json.dumps(temp_data, indent=2).encode("utf-8")).hexdigest()
-                if stored_hash == computed_hash:
-                    output_manager.print_success(f"{log_file.name} passed integrity check")
-                else:
-                    output_manager.print_error(f"{log_file.name} failed integrity check!")
-            except Exception as e:
-                output_manager.print_error(f"Failed to verify {log_file.name}: {e}")
+        for log_file, (_, intact, error) in zip(log_files, _map_logs(_check_log, log_files)):
+            if error is not None:
+                output_manager.print_error(f"Failed to verify {log_file.name}: {error}")
+            elif intact:
+                output_manager.print_success(f"{log_file.name} passed integrity check")
+            else:
+                output_manager.print_error(f"{log_file.name} failed integrity check!")
     except Exception as e:
         output_manager.print_error(f"Error verifying logs: {e}")
 
@@ -635,77 +1504,134 @@ def list_logs(folder: Path, output_manager=None):
         output_manager = OutputManager()
     
     try:
-        log_files = sorted(folder.glob("levelzap.log.*.json"))
+        log_files = find_log_files(folder)
         if not log_files:
             output_manager.print_error("No log files found.")
             return
 
         output_manager.print_info("\n📜 Available Logs:")
-        for log_file in log_files:
-            try:
-                with open(log_file, "r", encoding="utf-8") as f:
-                    log_data = json.load(f)
-                    meta = log_data.get("meta", {})
-                    timestamp = meta.get("log_timestamp", "unknown")
-                    simulated = meta.get("simulated", False)
-                    hash_value = meta.get("hash")
-                    temp_meta = dict(meta)
-                    temp_meta.pop("hash", None)
-                    recomputed = hashlib.sha256(json.dumps({"meta": temp_meta, "actions": log_data.get("actions", [])}, indent=2).encode("utf-8")).hexdigest()
-                    integrity = hash_value == recomputed
-                    status = f"{Fore.GREEN}✅ Valid{Style.RESET_ALL}" if integrity else f"{Fore.RED}❌ Corrupt{Style.RESET_ALL}"
-                    sim_flag = "🧪 Simulated" if simulated else "♻️ Real"
-                    print(f"{log_file.name} - {timestamp} - {sim_flag} - {status}")
-            except Exception as e:
-                output_manager.print_error(f"Failed to read {log_file.name}: {e}")
+        for log_file, (meta, integrity, error) in zip(log_files, _cached_log_checks(log_files)):
+            if error is not None:
+                output_manager.print_error(f"Failed to read {log_file.name}: {error}")
+                continue
+            timestamp = meta.get("log_timestamp", "unknown")
+            simulated = meta.get("simulated", False)
+            if integrity:
+                status = f"{output_manager.green}✅ Valid{output_manager.reset}"
+            else:
+                status = f"{output_manager.red}❌ Corrupt{output_manager.reset}"
+            sim_flag = "🧪 Simulated" if simulated else "♻️ Real"
+            print(f"{log_file.name} - {timestamp} - {sim_flag} - {status}")
     except Exception as e:
         output_manager.print_error(f"Error listing logs: {e}")
 
+def _cache_dir():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(cache_home) / "levelzap"
+
+def _update_cache_path():
+    return _cache_dir() / "update.json"
+
+def _write_cache(cache_path, obj):
+    """Write a cache file atomically, so concurrent runs never read half of it
+
+    Failures are ignored; the caches are only an optimisation.
+    """
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_bytes(_dumps(obj))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            tmp_path.unlink()
+
 def check_for_update(output_manager=None):
-    """Check for updates with error handling"""
+    """Check for updates with error handling
+
+    The last release seen is cached with its ETag. Within UPDATE_CACHE_TTL
+    of the last check it is used as is; after that the check is a
+    conditional request, usually answered with 304 Not Modified.
+    """
+    # Only this command talks to the network, so the HTTP stack is not
+    # loaded on every run
+    import urllib.error
+    import urllib.request
     if output_manager is None:
         output_manager = OutputManager()
     
     url = "https://api.github.com/repos/dterracino/levelzap-python/releases/latest"
+    cache_path = _update_cache_path()
     try:
-        with urllib.request.urlopen(url) as response:
-            data = json.load(response)
-            latest_version = data.get("tag_name", "").lstrip("v")
-            if latest_version and latest_version != LEVELZAP_VERSION:
-                output_manager.print_warning(f"Update available: v{latest_version} (You are using v{LEVELZAP_VERSION})")
-                output_manager.print_info(f"🔗 Download it from: {data.get('html_url')}")
+        cached = _loads(cache_path.read_bytes())
+        fresh = time.time() - cache_path.stat().st_mtime < UPDATE_CACHE_TTL
+    except (OSError, ValueError):
+        cached = {}
+        fresh = False
+    headers = {"User-Agent": f"levelzap/{LEVELZAP_VERSION}", "Accept": "application/vnd.github+json"}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    try:
+        try:
+            if fresh and "release" in cached:
+                data = cached["release"]
+                etag = None
             else:
-                output_manager.print_success(f"You are using the latest version: v{LEVELZAP_VERSION}")
+                with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=UPDATE_TIMEOUT) as response:
+                    data = _loads(response.read())
+                    etag = response.headers.get("ETag")
+        except urllib.error.HTTPError as e:
+            if e.code != 304 or "release" not in cached:
+                raise
+            data = cached["release"]
+            try:
+                os.utime(cache_path)  # confirmed current; restart the TTL
+            except OSError:
+                pass
+        else:
+            if etag:
+                _write_cache(cache_path, {"etag": etag, "release": {
+                    "tag_name": data.get("tag_name"), "html_url": data.get("html_url")}})
+        latest_version = (data.get("tag_name") or "").lstrip("v")
+        if latest_version and latest_version != LEVELZAP_VERSION:
+            output_manager.print_warning(f"Update available: v{latest_version} (You are using v{LEVELZAP_VERSION})")
+            output_manager.print_info(f"🔗 Download it from: {data.get('html_url')}")
+        else:
+            output_manager.print_success(f"You are using the latest version: v{LEVELZAP_VERSION}")
     except Exception as e:
         output_manager.print_error(f"Could not check for update: {e}")
 
 def remove_empty_folders(root: Path, simulate=False, recurse=False, output_manager=None):
     """Remove empty folders with improved error handling and output management"""
+    from tqdm import tqdm
     if output_manager is None:
         output_manager = OutputManager()
     
     try:
-        log_file = get_log_filename()
-        actions = []
+        started = datetime.now()
         
         # Find empty folders
         empty_folders = []
         if recurse:
-            # Find all directories recursively, check from deepest first
-            all_dirs = [d for d in root.rglob('*') if d.is_dir() and d != root]
-            all_dirs.sort(key=lambda x: len(x.parts), reverse=True)  # Deepest first
+            # A bottom-up walk lists every folder once, deepest first, and
+            # its listing already says whether it is empty. Folders that
+            # cannot be read are skipped
+            root_str = os.fspath(root)
+            for dirpath, dirnames, filenames in os.walk(root_str, topdown=False):
+                if not dirnames and not filenames and dirpath != root_str:
+                    empty_folders.append(dirpath)
         else:
             # Only check immediate subdirectories
-            all_dirs = [d for d in root.iterdir() if d.is_dir()]
-        
-        # Check which folders are empty
-        for folder in all_dirs:
-            try:
-                if not any(folder.iterdir()):  # Check if folder is empty
-                    empty_folders.append(folder)
-            except OSError:
-                # Skip folders we can't read
-                continue
+            with os.scandir(root) as it:
+                subfolders = [entry.path for entry in it if _entry_is_dir(entry)]
+            for folder in subfolders:
+                try:
+                    with os.scandir(folder) as it:
+                        if next(it, None) is None:
+                            empty_folders.append(folder)
+                except OSError:
+                    # Skip folders we can't read
+                    continue
         
         if not empty_folders:
             operation_type = "recursive empty folder cleanup" if recurse else "empty folder cleanup"
@@ -715,38 +1641,27 @@ def remove_empty_folders(root: Path, simulate=False, recurse=False, output_manag
         operation_type = "recursive empty folder removal" if recurse else "empty folder removal"
         output_manager.print_operation_start(operation_type, len(empty_folders), root, simulate)
         
-        # Remove empty folders
-        with tqdm(total=len(empty_folders), desc="Removing empty folders", unit="folder") as pbar:
-            for folder in empty_folders:
+        meta = {
+            "version": LEVELZAP_VERSION,
+            "log_timestamp": started.isoformat(),
+            "simulated": simulate,
+            "recursive": recurse,
+            "operation": "remove_empty_folders"
+        }
+        log_path = root / get_log_filename(started)
+        # Remove empty folders, logging each one as it goes
+        with LogWriter(log_path, meta) as log, tqdm(total=len(empty_folders), desc="Removing empty folders", unit="folder", disable=None) as pbar:
+            for done, folder in enumerate(empty_folders, 1):
+                if not done % PROGRESS_BATCH:
+                    pbar.update(PROGRESS_BATCH)
                 try:
-                    perform_action(simulate, "delete_empty_folder", src=folder, log=actions, output_manager=output_manager)
-                    pbar.update(1)
+                    perform_action(simulate, "delete_empty_folder", src=folder, log=log, output_manager=output_manager)
                 except Exception as e:
                     output_manager.print_error(f"Error removing empty folder {folder}: {e}")
                     continue
+            pbar.update(len(empty_folders) % PROGRESS_BATCH)
         
-        # Write log file
-        log_path = root / log_file
-        try:
-            with open(log_path, "w", encoding="utf-8") as f:
-                meta = {
-                    "version": LEVELZAP_VERSION,
-                    "log_timestamp": datetime.now().isoformat(),
-                    "simulated": simulate,
-                    "recursive": recurse,
-                    "operation": "remove_empty_folders"
-                }
-                log_data = {
-                    "meta": meta,
-                    "actions": actions
-                }
-                raw_log = json.dumps(log_data, indent=2).encode("utf-8")
-                log_data["meta"]["hash"] = hashlib.sha256(raw_log).hexdigest()
-                f.write(json.dumps(log_data, indent=2))
-            
-            output_manager.print_log_completion(log_path, simulate)
-        except Exception as e:
-            output_manager.print_error(f"Failed to write log file: {e}")
+        output_manager.print_log_completion(log_path, simulate)
     
     except Exception as e:
         if output_manager:
@@ -756,34 +1671,41 @@ def remove_empty_folders(root: Path, simulate=False, recurse=False, output_manag
 
 def remove_zero_byte_files(root: Path, simulate=False, recurse=False, output_manager=None):
     """Remove zero-byte files with improved error handling and output management"""
+    from tqdm import tqdm
     if output_manager is None:
         output_manager = OutputManager()
     
     try:
-        log_file = get_log_filename()
-        actions = []
+        started = datetime.now()
         
         # Find zero-byte files
         zero_byte_files = []
         if recurse:
-            # Find all files recursively
-            all_files = [f for f in root.rglob('*') if f.is_file()]
+            # Find all files recursively; the walk's DirEntry objects are
+            # stat-ed directly, so no Path is built per file
+            all_files = _walk_files(root)
         else:
             # Only check immediate files and files in subdirectories (one level deep)
             all_files = []
-            for item in root.iterdir():
-                if item.is_file():
-                    all_files.append(item)
-                elif item.is_dir():
-                    for subitem in item.iterdir():
-                        if subitem.is_file():
-                            all_files.append(subitem)
+            subfolders = []
+            with os.scandir(root) as it:
+                for entry in it:
+                    if entry.is_file():
+                        all_files.append(entry)
+                    elif _entry_is_dir(entry):
+                        subfolders.append(entry.path)
+            for folder in subfolders:
+                try:
+                    all_files.extend(_walk_files(folder, recursive=False))
+                except OSError:
+                    # Skip folders we can't read
+                    continue
         
         # Check which files are zero-byte
         for file_path in all_files:
             try:
                 if file_path.stat().st_size == 0:
-                    zero_byte_files.append(file_path)
+                    zero_byte_files.append(os.fspath(file_path))
             except OSError:
                 # Skip files we can't read
                 continue
@@ -796,38 +1718,27 @@ def remove_zero_byte_files(root: Path, simulate=False, recurse=False, output_man
         operation_type = "recursive zero-byte file removal" if recurse else "zero-byte file removal"
         output_manager.print_operation_start(operation_type, len(zero_byte_files), root, simulate)
         
-        # Remove zero-byte files
-        with tqdm(total=len(zero_byte_files), desc="Removing zero-byte files", unit="file") as pbar:
-            for file_path in zero_byte_files:
+        meta = {
+            "version": LEVELZAP_VERSION,
+            "log_timestamp": started.isoformat(),
+            "simulated": simulate,
+            "recursive": recurse,
+            "operation": "remove_zero_byte_files"
+        }
+        log_path = root / get_log_filename(started)
+        # Remove zero-byte files, logging each one as it goes
+        with LogWriter(log_path, meta) as log, tqdm(total=len(zero_byte_files), desc="Removing zero-byte files", unit="file", disable=None) as pbar:
+            for done, file_path in enumerate(zero_byte_files, 1):
+                if not done % PROGRESS_BATCH:
+                    pbar.update(PROGRESS_BATCH)
                 try:
-                    perform_action(simulate, "delete_zero_file", src=file_path, log=actions, output_manager=output_manager)
-                    pbar.update(1)
+                    perform_action(simulate, "delete_zero_file", src=file_path, log=log, output_manager=output_manager)
                 except Exception as e:
                     output_manager.print_error(f"Error removing zero-byte file {file_path}: {e}")
                     continue
+            pbar.update(len(zero_byte_files) % PROGRESS_BATCH)
         
-        # Write log file
-        log_path = root / log_file
-        try:
-            with open(log_path, "w", encoding="utf-8") as f:
-                meta = {
-                    "version": LEVELZAP_VERSION,
-                    "log_timestamp": datetime.now().isoformat(),
-                    "simulated": simulate,
-                    "recursive": recurse,
-                    "operation": "remove_zero_byte_files"
-                }
-                log_data = {
-                    "meta": meta,
-                    "actions": actions
-                }
-                raw_log = json.dumps(log_data, indent=2).encode("utf-8")
-                log_data["meta"]["hash"] = hashlib.sha256(raw_log).hexdigest()
-                f.write(json.dumps(log_data, indent=2))
-            
-            output_manager.print_log_completion(log_path, simulate)
-        except Exception as e:
-            output_manager.print_error(f"Failed to write log file: {e}")
+        output_manager.print_log_completion(log_path, simulate)
     
     except Exception as e:
         if output_manager:
@@ -835,6 +1746,109 @@ def remove_zero_byte_files(root: Path, simulate=False, recurse=False, output_man
         else:
             print(f"❌ Error during zero-byte file removal: {e}")
 
+def _plan_cleanup(root, recurse):
+    """List the zero-byte files and the folders they leave empty
+
+    Returns ``(files, folders)`` in deletion order. A folder counts as empty
+    when nothing would be left in it once the planned files and subfolders
+    are gone, so folders emptied by the cleanup itself are removed too.
+    """
+    root_str = os.fspath(root)
+    files = []
+    folders = []
+    removed = set()
+    if recurse:
+        # Bottom-up, so each folder's subfolders are settled before it
+        walk = os.walk(root_str, topdown=False)
+    else:
+        # Root's own files, and the files and emptiness of its subfolders
+        subfolders = []
+        root_files = []
+        with os.scandir(root_str) as it:
+            for entry in it:
+                if _entry_is_dir(entry):
+                    subfolders.append(entry.path)
+                else:
+                    root_files.append(entry.name)
+        walk = []
+        for folder in subfolders:
+            try:
+                with os.scandir(folder) as it:
+                    names = [entry.name for entry in it]
+            except OSError:
+                # Skip folders we can't read
+                continue
+            walk.append((folder, [], names))
+        walk.append((root_str, subfolders, root_files))
+    for dirpath, dirnames, filenames in walk:
+        left = len(dirnames) + len(filenames)
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                # Skip files we can't read
+                continue
+            if stat.S_ISREG(st.st_mode) and st.st_size == 0:
+                files.append(path)
+                left -= 1
+        left -= sum(1 for name in dirnames if os.path.join(dirpath, name) in removed)
+        if not left and dirpath != root_str:
+            removed.add(dirpath)
+            folders.append(dirpath)
+    return files, folders
+
+def cleanup_tree(root: Path, simulate=False, recurse=False, output_manager=None):
+    """Remove zero-byte files and then empty folders in a single pass
+
+    Used when both cleanups are requested: the tree is walked once and one
+    log records both kinds of deletion.
+    """
+    from tqdm import tqdm
+    if output_manager is None:
+        output_manager = OutputManager()
+    
+    try:
+        started = datetime.now()
+        
+        files, folders = _plan_cleanup(root, recurse)
+        if not files and not folders:
+            operation_type = "recursive cleanup" if recurse else "cleanup"
+            output_manager.print_success(f"No zero-byte files or empty folders found for {operation_type}")
+            return
+        
+        operation_type = "recursive zero-byte file and empty folder removal" if recurse else "zero-byte file and empty folder removal"
+        # Files go first so the folders holding them are empty by their turn
+        steps = [("delete_zero_file", path) for path in files] + [("delete_empty_folder", path) for path in folders]
+        output_manager.print_operation_start(operation_type, len(steps), root, simulate)
+        
+        meta = {
+            "version": LEVELZAP_VERSION,
+            "log_timestamp": started.isoformat(),
+            "simulated": simulate,
+            "recursive": recurse,
+            "operation": "cleanup_tree"
+        }
+        log_path = root / get_log_filename(started)
+        with LogWriter(log_path, meta) as log, tqdm(total=len(steps), desc="Cleaning up", unit="item", disable=None) as pbar:
+            for done, (action_type, path) in enumerate(steps, 1):
+                if not done % PROGRESS_BATCH:
+                    pbar.update(PROGRESS_BATCH)
+                try:
+                    perform_action(simulate, action_type, src=path, log=log, output_manager=output_manager)
+                except Exception as e:
+                    output_manager.print_error(f"Error removing {path}: {e}")
+                    continue
+            pbar.update(len(steps) % PROGRESS_BATCH)
+        
+        output_manager.print_log_completion(log_path, simulate)
+    
+    except Exception as e:
+        if output_manager:
+            output_manager.print_error(f"Error during cleanup: {e}")
+        else:
+            print(f"❌ Error during cleanup: {e}")
+
 def display_user_selections(args, output_manager):
     """Display the user's selected options"""
     output_manager.print_info("🔧 Operation Details:")
@@ -876,10 +1890,14 @@ def main():
     
     try:
         args = parse_args()
+        # Every operation works on the same folder and the optional flags
+        # are read once
+        target_path = Path(args.target).resolve()
+        remove_empty = getattr(args, 'remove_empty', False)
+        remove_zero = getattr(args, 'remove_zero', False)
         
         # Handle analysis operations first
         if args.size or args.count:
-            target_path = Path(args.target).resolve()
             ensure_valid_directory(target_path, output_manager)
             
             display_user_selections(args, output_manager)
@@ -905,41 +1923,44 @@ def main():
                 sys.exit(0)
 
         # Handle cleanup operations
-        if hasattr(args, 'remove_empty') and args.remove_empty or hasattr(args, 'remove_zero') and args.remove_zero:
-            target_path = Path(args.target).resolve()
+        if remove_empty or remove_zero:
             ensure_valid_directory(target_path, output_manager)
             
             display_user_selections(args, output_manager)
             
-            if hasattr(args, 'remove_empty') and args.remove_empty:
+            if remove_empty and remove_zero:
+                # One pass does both, and also removes folders that only held
+                # zero-byte files
+                try:
+                    cleanup_tree(target_path, simulate=args.dry_run, recurse=args.recurse, output_manager=output_manager)
+                except Exception as e:
+                    output_manager.print_error(f"Cleanup failed: {e}")
+            elif remove_empty:
                 try:
                     remove_empty_folders(target_path, simulate=args.dry_run, recurse=args.recurse, output_manager=output_manager)
                 except Exception as e:
                     output_manager.print_error(f"Empty folder removal failed: {e}")
-            
-            if hasattr(args, 'remove_zero') and args.remove_zero:
+            elif remove_zero:
                 try:
                     remove_zero_byte_files(target_path, simulate=args.dry_run, recurse=args.recurse, output_manager=output_manager)
                 except Exception as e:
                     output_manager.print_error(f"Zero-byte file removal failed: {e}")
             
-            if (hasattr(args, 'remove_empty') and args.remove_empty) or (hasattr(args, 'remove_zero') and args.remove_zero):
-                sys.exit(0)
+            sys.exit(0)
 
         # Handle other operations
         if args.list_logs:
-            list_logs(Path(args.target).resolve(), output_manager)
+            list_logs(target_path, output_manager)
             sys.exit(0)
 
         if args.verify:
-            verify_all_logs(Path(args.target).resolve(), output_manager)
+            verify_all_logs(target_path, output_manager)
             sys.exit(0)
 
         if args.update:
             check_for_update(output_manager)
             sys.exit(0)
         
-        target_path = Path(args.target).resolve()
         ensure_valid_directory(target_path, output_manager)
         
         display_user_selections(args, output_manager)
@@ -947,7 +1968,7 @@ def main():
         if args.revert_all:
             revert_all_logs(target_path, keep_logs=args.keep_logs, output_manager=output_manager)
         elif args.revert:
-            log_files = sorted(target_path.glob("levelzap.log.*.json"), reverse=True)
+            log_files = find_log_files(target_path, newest_first=True)
             if not log_files:
                 output_manager.print_error("No log files found to revert.")
                 sys.exit(1)
@@ -955,8 +1976,8 @@ def main():
         else:
             # Default to levelzap operation if no other operation is specified, or if --levelzap is explicitly provided
             should_levelzap = (not any([args.revert_all, args.revert, args.list_logs, args.verify, args.update, args.size, args.count, 
-                                      getattr(args, 'remove_empty', False), getattr(args, 'remove_zero', False)]) 
-                             or (hasattr(args, 'levelzap') and args.levelzap))
+                                      remove_empty, remove_zero]) 
+                             or getattr(args, 'levelzap', False))
             
             if should_levelzap:
                 flatten_folder(target_path, simulate=args.dry_run, merge=args.merge, 
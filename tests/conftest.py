@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# The tests import levelzap.py from the repository root; it is put on the
+# path once here rather than by every test module
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from levelzap import OutputManager
+
+@pytest.fixture(scope="session")
+def output_manager():
+    """A shared OutputManager; it holds no per-test state"""
+    return OutputManager()
@@ -1,11 +1,8 @@
-import sys
 import tempfile
-import shutil
 import json
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-from levelzap import remove_empty_folders, remove_zero_byte_files, OutputManager
+from levelzap import remove_empty_folders, remove_zero_byte_files, cleanup_tree, OutputManager, find_log_files
 
 def test_remove_empty_folders_non_recursive():
     """Test removing empty folders without recursion"""
@@ -29,7 +26,7 @@ def test_remove_empty_folders_non_recursive():
         remove_empty_folders(tmp_path, simulate=True, recurse=False, output_manager=output_manager)
         
         # Check log file
-        log_files = list(tmp_path.glob("levelzap.log.*.json"))
+        log_files = find_log_files(tmp_path)
         assert len(log_files) == 1
         
         with open(log_files[0], 'r') as f:
@@ -66,7 +63,7 @@ def test_remove_empty_folders_recursive():
         remove_empty_folders(tmp_path, simulate=True, recurse=True, output_manager=output_manager)
         
         # Check log file
-        log_files = list(tmp_path.glob("levelzap.log.*.json"))
+        log_files = find_log_files(tmp_path)
         assert len(log_files) == 1
         
         with open(log_files[0], 'r') as f:
@@ -109,7 +106,7 @@ def test_remove_zero_byte_files_non_recursive():
         remove_zero_byte_files(tmp_path, simulate=True, recurse=False, output_manager=output_manager)
         
         # Check log file
-        log_files = list(tmp_path.glob("levelzap.log.*.json"))
+        log_files = find_log_files(tmp_path)
         assert len(log_files) == 1
         
         with open(log_files[0], 'r') as f:
@@ -150,7 +147,7 @@ def test_remove_zero_byte_files_recursive():
         remove_zero_byte_files(tmp_path, simulate=True, recurse=True, output_manager=output_manager)
         
         # Check log file
-        log_files = list(tmp_path.glob("levelzap.log.*.json"))
+        log_files = find_log_files(tmp_path)
         assert len(log_files) == 1
         
         with open(log_files[0], 'r') as f:
@@ -242,7 +239,7 @@ def test_no_files_to_remove():
         remove_zero_byte_files(tmp_path, simulate=True, recurse=True, output_manager=output_manager)
         
         # Should not create log files when nothing was found
-        log_files = list(tmp_path.glob("levelzap.log.*.json"))
+        log_files = find_log_files(tmp_path)
         assert len(log_files) == 0
 
 
@@ -261,7 +258,7 @@ def test_error_handling():
         remove_zero_byte_files(tmp_path, simulate=True, recurse=False, output_manager=output_manager)
         
         # Check log file was created
-        log_files = list(tmp_path.glob("levelzap.log.*.json"))
+        log_files = find_log_files(tmp_path)
         assert len(log_files) == 1
 
 
@@ -283,7 +280,7 @@ def test_revert_empty_folder_removal():
         assert not empty_folder.exists()
         
         # Get the log file
-        log_files = list(tmp_path.glob("levelzap.log.*.json"))
+        log_files = find_log_files(tmp_path)
         assert len(log_files) == 1
         
         # Import revert function
@@ -315,7 +312,7 @@ def test_revert_zero_byte_file_removal():
         assert not zero_file.exists()
         
         # Get the log file
-        log_files = list(tmp_path.glob("levelzap.log.*.json"))
+        log_files = find_log_files(tmp_path)
         assert len(log_files) == 1
         
         # Import revert function
@@ -359,7 +356,7 @@ def test_combined_operations_with_recurse():
         remove_zero_byte_files(tmp_path, simulate=True, recurse=True, output_manager=output_manager)
         
         # Check both log files were created (they may share same timestamp)
-        log_files = list(tmp_path.glob("levelzap.log.*.json"))
+        log_files = find_log_files(tmp_path)
         assert len(log_files) >= 1  # At least one log file should exist
         
         # Read the last log file which should contain zero-byte file removal
@@ -369,4 +366,31 @@ def test_combined_operations_with_recurse():
         # The last operation should be zero-byte file removal
         assert last_log_data["meta"]["operation"] == "remove_zero_byte_files"
         delete_actions = [action for action in last_log_data["actions"] if action["action"] == "delete_zero_file"]
-        assert len(delete_actions) == 2  # zero_shallow and zero_deep
\ No newline at end of file
+        assert len(delete_actions) == 2  # zero_shallow and zero_deep
+
+def test_cleanup_tree_removes_folders_emptied_by_cleanup(tmp_path):
+    """Test the combined cleanup removing folders that only held zero-byte files"""
+    output_manager = OutputManager()
+    
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "a" / "b" / "zero.txt").touch()
+    (tmp_path / "a" / "empty").mkdir()
+    (tmp_path / "keep").mkdir()
+    (tmp_path / "keep" / "zero.txt").touch()
+    (tmp_path / "keep" / "data.txt").write_text("content")
+    
+    cleanup_tree(tmp_path, simulate=False, recurse=True, output_manager=output_manager)
+    
+    assert not (tmp_path / "a").exists()
+    assert not (tmp_path / "keep" / "zero.txt").exists()
+    assert (tmp_path / "keep" / "data.txt").read_text() == "content"
+    
+    log_files = find_log_files(tmp_path)
+    assert len(log_files) == 1
+    with open(log_files[0], 'r') as f:
+        log_data = json.load(f)
+    assert log_data["meta"]["operation"] == "cleanup_tree"
+    actions = [(action["action"], Path(action["source"]).relative_to(tmp_path).as_posix()) for action in log_data["actions"]]
+    assert sorted(actions[:2]) == [("delete_zero_file", "a/b/zero.txt"), ("delete_zero_file", "keep/zero.txt")]
+    assert sorted(actions[2:4]) == [("delete_empty_folder", "a/b"), ("delete_empty_folder", "a/empty")]
+    assert actions[4:] == [("delete_empty_folder", "a")]
@@ -1,7 +1,26 @@
+import io
+import os
 import sys
 import tempfile
-import subprocess
+import contextlib
 from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from levelzap import _build_parser, _fast_parse_args, main, parse_args
+
+def run_levelzap(*argv):
+    """Run main() in-process with the given arguments, like a command line"""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    returncode = 0
+    with mock.patch.object(sys, "argv", ["levelzap.py", *argv]), \
+            contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            main()
+        except SystemExit as e:
+            returncode = e.code or 0
+    return SimpleNamespace(returncode=returncode, stdout=stdout.getvalue(), stderr=stderr.getvalue())
 
 def test_dry_run_argument_works():
     """Test that --dry-run argument works correctly"""
@@ -14,12 +33,7 @@ def test_dry_run_argument_works():
         (sub / "file.txt").write_text("test content")
         
         # Test --dry-run
-        result = subprocess.run(
-            [sys.executable, "levelzap.py", "--dry-run", str(tmp_path)],
-            capture_output=True,
-            text=True,
-            cwd=str(Path(__file__).resolve().parents[1])
-        )
+        result = run_levelzap("--dry-run", str(tmp_path))
         
         assert result.returncode == 0
         assert "Simulation" in result.stdout
@@ -40,12 +54,7 @@ def test_short_s_argument_works():
         (sub / "file.txt").write_text("test content")
         
         # Test -s
-        result = subprocess.run(
-            [sys.executable, "levelzap.py", "-s", str(tmp_path)],
-            capture_output=True,
-            text=True,
-            cwd=str(Path(__file__).resolve().parents[1])
-        )
+        result = run_levelzap("-s", str(tmp_path))
         
         assert result.returncode == 0
         assert "Simulation" in result.stdout
@@ -57,18 +66,29 @@ def test_old_simulate_argument_no_longer_works():
         tmp_path = Path(tmp_dir)
         
         # Test --simulate should fail
-        result = subprocess.run(
-            [sys.executable, "levelzap.py", "--simulate", str(tmp_path)],
-            capture_output=True,
-            text=True,
-            cwd=str(Path(__file__).resolve().parents[1])
-        )
+        result = run_levelzap("--simulate", str(tmp_path))
         
         assert result.returncode != 0
         assert "unrecognized arguments" in result.stderr or "error" in result.stderr.lower()
 
+def test_fast_parse_matches_argparse():
+    """Test that the argparse-free path gives the same arguments"""
+    for argv in ([], ["some/dir"], ["-s", "some/dir"], ["--recurse", "-s", "."],
+                 ["some/dir", "--revert", "-kl"], ["-m", "--size", "--count", "x"]):
+        fast = _fast_parse_args(argv)
+        assert fast is not None
+        assert vars(fast) == vars(_build_parser().parse_args(argv))
+
+def test_fast_parse_defers_to_argparse():
+    """Test that anything beyond plain flags and a target goes to argparse"""
+    for argv in (["--help"], ["--dry"], ["--duplicate-strategy", "newest"], ["a", "b"], ["-m", "-o"]):
+        assert _fast_parse_args(argv) is None
+    assert parse_args(["--duplicate-strategy", "newest", "x"]).duplicate_strategy == "newest"
+
 if __name__ == "__main__":
     test_dry_run_argument_works()
     test_short_s_argument_works() 
     test_old_simulate_argument_no_longer_works()
+    test_fast_parse_matches_argparse()
+    test_fast_parse_defers_to_argparse()
     print("All tests passed!")
\ No newline at end of file
@@ -1,9 +1,8 @@
-import sys
 import tempfile
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-from levelzap import FileAnalyzer, OutputManager
+import levelzap
+from levelzap import FileAnalyzer, OutputManager, check_for_update
 
 def test_file_analyzer_count():
     """Test file counting functionality"""
@@ -55,6 +54,55 @@ def test_file_analyzer_size():
         size_recursive = analyzer.calculate_size(tmp_path, recursive=True)
         assert size_recursive == 14
 
+def test_file_analyzer_recursive_matches_serial_walk(tmp_path):
+    """The parallel recursive walk agrees with a plain serial walk"""
+    analyzer = FileAnalyzer(OutputManager())
+    for i in range(6):
+        folder = tmp_path / f"dir{i}" / "nested" / f"deep{i}"
+        folder.mkdir(parents=True)
+        for j in range(i + 1):
+            (folder / f"file{j}.txt").write_text("x" * j)
+            (folder.parent / f"file{j}.txt").write_text("y")
+    
+    expected = [p for p in tmp_path.rglob("*") if p.is_file()]
+    assert analyzer.count_files(tmp_path, recursive=True) == len(expected)
+    assert analyzer.calculate_size(tmp_path, recursive=True) == sum(p.stat().st_size for p in expected)
+
+def test_walk_thread_setting_is_validated(tmp_path, monkeypatch):
+    """Bad LEVELZAP_WALK_THREADS values fall back or are clamped"""
+    monkeypatch.setenv("LEVELZAP_WALK_THREADS", "lots")
+    assert levelzap._walk_workers() >= 1
+    monkeypatch.setenv("LEVELZAP_WALK_THREADS", "-3")
+    assert levelzap._walk_workers() == 1
+    monkeypatch.setenv("LEVELZAP_WALK_THREADS", "5")
+    assert levelzap._walk_workers() == 5
+    
+    # The walk still finishes with a setting that would start no threads
+    monkeypatch.setattr(levelzap, "WALK_WORKERS", 0)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "file.txt").write_text("data")
+    assert FileAnalyzer(OutputManager()).count_files(tmp_path, recursive=True) == 1
+
+def test_parallel_walk_counts_subfolders_queued_late(tmp_path, monkeypatch):
+    """A sibling finishing a child before its parent's bookkeeping loses nothing"""
+    import queue
+    import time
+
+    class SlowQueue(queue.SimpleQueue):
+        # Stall after queueing real work so another worker can take the
+        # folder and finish it before the queueing worker carries on
+        def put(self, item, *args, **kwargs):
+            super().put(item, *args, **kwargs)
+            if item is not None:
+                time.sleep(0.05)
+
+    monkeypatch.setattr(queue, "SimpleQueue", SlowQueue)
+    monkeypatch.setattr(levelzap, "WALK_WORKERS", 2)
+    for name in ("one", "two"):
+        (tmp_path / "top" / name).mkdir(parents=True)
+        (tmp_path / "top" / name / "file.txt").write_text("data")
+    assert FileAnalyzer(OutputManager()).count_files(tmp_path, recursive=True) == 2
+
 def test_format_size():
     """Test size formatting"""
     output_manager = OutputManager()
@@ -64,4 +112,36 @@ def test_format_size():
     assert analyzer.format_size(512) == "512.0 B"
     assert analyzer.format_size(1024) == "1.0 KB"
     assert analyzer.format_size(1536) == "1.5 KB"
-    assert analyzer.format_size(1024 * 1024) == "1.0 MB"
\ No newline at end of file
+    assert analyzer.format_size(1024 * 1024) == "1.0 MB"
+    assert analyzer.format_size(1024 * 1024 - 1) == "1024.0 KB"
+    assert analyzer.format_size(1024 ** 5) == "1.0 PB"
+    assert analyzer.format_size(2048 * 1024 ** 5) == "2048.0 PB"
+
+def test_update_check_uses_fresh_cache(tmp_path, monkeypatch, capsys):
+    """Test that a recent cached release is reported without a network call"""
+    import urllib.request
+    
+    def no_network(*args, **kwargs):
+        raise AssertionError("network used despite a fresh cache")
+    
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setattr(urllib.request, "urlopen", no_network)
+    cache = tmp_path / "levelzap" / "update.json"
+    cache.parent.mkdir()
+    cache.write_text('{"etag": "W/1", "release": {"tag_name": "v99.0", "html_url": "https://example.invalid"}}')
+    
+    check_for_update(OutputManager())
+    assert "Update available: v99.0" in capsys.readouterr().out
+
+def test_output_manager_colours_only_when_requested(capsys):
+    """Plain output carries no ANSI codes; coloured output wraps each line"""
+    OutputManager(color=False).print_error("boom")
+    assert capsys.readouterr().out == "❌ boom\n"
+    
+    OutputManager(color=True).print_error("boom")
+    out = capsys.readouterr().out
+    assert out.startswith("\x1b[31m❌ boom") and out.endswith("\x1b[0m\n")
+    
+    # Captured output is not a terminal, so the default is plain
+    OutputManager().print_success("done")
+    assert capsys.readouterr().out == "✅ done\n"
@@ -1,194 +1,341 @@
-import sys
-import tempfile
-import shutil
+import os
+import hashlib
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-from levelzap import flatten_folder, OutputManager, resolve_duplicate_file
-
-def test_flatten_folder_recurse():
-    """Test recursive flattening functionality"""
-    output_manager = OutputManager()
-    
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        tmp_path = Path(tmp_dir)
-        
-        # Create nested directory structure
-        (tmp_path / "subfolder1").mkdir()
-        (tmp_path / "subfolder1" / "deepfolder").mkdir()
-        (tmp_path / "subfolder2").mkdir()
-        
-        # Create test files
-        (tmp_path / "subfolder1" / "file1.txt").write_text("file1 content")
-        (tmp_path / "subfolder1" / "deepfolder" / "file2.txt").write_text("file2 content")
-        (tmp_path / "subfolder2" / "file3.txt").write_text("file3 content")
-        
-        # Test recursive flatten
-        flatten_folder(tmp_path, simulate=True, recurse=True, output_manager=output_manager)
-        
-        # Check log file was created with recursive flag
-        log_files = list(tmp_path.glob("levelzap.log.*.json"))
-        assert len(log_files) == 1
-        
-        import json
-        with open(log_files[0], 'r') as f:
-            log_data = json.load(f)
-        
-        assert log_data["meta"]["recursive"] is True
-        
-        # Check that all files would be moved to root
-        moved_files = [action for action in log_data["actions"] if action["action"] == "move"]
-        assert len(moved_files) == 3  # All three files should be moved
-        
-        # Verify destination paths are all in root
-        for action in moved_files:
-            dest_path = Path(action["destination"])
-            assert dest_path.parent == tmp_path
-
-
-def test_flatten_folder_non_recurse():
-    """Test non-recursive flattening (original behavior)"""
-    output_manager = OutputManager()
-    
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        tmp_path = Path(tmp_dir)
-        
-        # Create nested directory structure
-        (tmp_path / "subfolder1").mkdir()
-        (tmp_path / "subfolder1" / "deepfolder").mkdir()
-        (tmp_path / "subfolder2").mkdir()
-        
-        # Create test files
-        (tmp_path / "subfolder1" / "file1.txt").write_text("file1 content")
-        (tmp_path / "subfolder1" / "deepfolder" / "file2.txt").write_text("file2 content")
-        (tmp_path / "subfolder2" / "file3.txt").write_text("file3 content")
-        
-        # Test non-recursive flatten
-        flatten_folder(tmp_path, simulate=True, recurse=False, output_manager=output_manager)
-        
-        # Check log file
-        log_files = list(tmp_path.glob("levelzap.log.*.json"))
-        assert len(log_files) == 1
-        
-        import json
-        with open(log_files[0], 'r') as f:
-            log_data = json.load(f)
-        
-        assert log_data["meta"]["recursive"] is False
-        
-        # Check that only immediate subfolder contents would be moved
-        moved_actions = [action for action in log_data["actions"] if action["action"] == "move"]
-        # Should move: file1.txt, deepfolder (as a folder), file3.txt
-        assert len(moved_actions) == 3
-
-
-def test_duplicate_strategy_rename():
-    """Test rename duplicate strategy"""
-    output_manager = OutputManager()
-    
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        tmp_path = Path(tmp_dir)
-        
-        # Create existing file
-        existing_file = tmp_path / "test.txt"
-        existing_file.write_text("existing content")
-        
-        # Test rename strategy
-        new_file = tmp_path / "subfolder" / "test.txt"
-        new_file.parent.mkdir()
-        new_file.write_text("new content")
-        
-        resolved_path = resolve_duplicate_file(existing_file, new_file, "rename", output_manager)
-        
-        # Should create a renamed version
+import pytest
+
+from levelzap import flatten_folder, resolve_duplicate_file, LogWriter, revert_log, read_log, find_log_files, LOG_HASH_MARKER
+
+# Two levels of subfolders, so recursive and one-level flattens differ.
+# Contents are bytes so they are written without encoding each time
+NESTED_TREE = {
+    "subfolder1/file1.txt": b"file1 content",
+    "subfolder1/deepfolder/file2.txt": b"file2 content",
+    "subfolder2/file3.txt": b"file3 content",
+}
+
+def make_tree(root, files):
+    """Create each relative path in ``files`` under root with the given bytes
+
+    Every folder is made once, and each file is written in a single call.
+    """
+    made = set()
+    for relative, content in files.items():
+        path = os.path.join(root, relative)
+        folder = os.path.dirname(path)
+        if folder not in made:
+            os.makedirs(folder, exist_ok=True)
+            made.add(folder)
+        with open(path, "wb") as f:
+            f.write(content)
+
+@pytest.mark.parametrize("recurse", [True, False])
+def test_flatten_folder(tmp_path, recurse, output_manager):
+    """Test recursive and non-recursive (original behavior) flattening"""
+    # Create nested directory structure with test files
+    make_tree(tmp_path, NESTED_TREE)
+    
+    flatten_folder(tmp_path, simulate=True, recurse=recurse, output_manager=output_manager)
+    
+    # Check log file was created with the recursive flag
+    log_files = find_log_files(tmp_path)
+    assert len(log_files) == 1
+    
+    log_data, _ = read_log(log_files[0])
+    
+    assert log_data["meta"]["recursive"] is recurse
+    
+    # Recursing moves all three files; otherwise only immediate subfolder
+    # contents move: file1.txt, deepfolder (as a folder), file3.txt
+    # One pass counts the moves and collects their destination folders
+    moved = 0
+    parents = set()
+    for action in log_data["actions"]:
+        if action["action"] == "move":
+            moved += 1
+            parents.add(os.path.dirname(action["destination"]))
+    assert moved == 3
+    # Every destination is in root; a failure shows the folders that differ
+    assert parents == {str(tmp_path)}
+
+
+@pytest.mark.parametrize("strategy, existing_content, new_content, replaces", [
+    # Should create a renamed version
+    ("rename", "existing content", "new content", False),
+    # Should return existing_file path (overwrite with newer)
+    ("newest", "existing content", "newer content", True),
+    # Should return existing_file path (overwrite with larger)
+    ("largest", "small", "this is a much larger file content", True),
+], ids=["rename", "newest", "largest"])
+def test_duplicate_strategy(tmp_path, strategy, existing_content, new_content, replaces, output_manager):
+    """Test the rename, newest and largest duplicate strategies"""
+    # Create existing file
+    existing_file = tmp_path / "test.txt"
+    existing_file.write_text(existing_content)
+    
+    # Create the incoming file (in subfolder to simulate the scenario)
+    new_file = tmp_path / "subfolder" / "test.txt"
+    new_file.parent.mkdir()
+    new_file.write_text(new_content)
+    
+    # Stamp distinct modification times rather than sleeping between writes
+    os.utime(existing_file, (1_000_000_000, 1_000_000_000))
+    os.utime(new_file, (1_000_000_100, 1_000_000_100))
+    
+    resolved_path = resolve_duplicate_file(existing_file, new_file, strategy, output_manager)
+    
+    if replaces:
+        assert resolved_path == existing_file
+    else:
         assert resolved_path != existing_file
         assert resolved_path.name.startswith("test_")
         assert resolved_path.suffix == ".txt"
 
 
-def test_duplicate_strategy_newest():
-    """Test newest duplicate strategy"""
-    output_manager = OutputManager()
-    
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        tmp_path = Path(tmp_dir)
-        
-        # Create older file
-        existing_file = tmp_path / "test.txt"
-        existing_file.write_text("existing content")
-        
-        # Create newer file (in subfolder to simulate the scenario)
-        import time
-        time.sleep(0.01)  # Ensure different timestamp
-        new_file = tmp_path / "subfolder" / "test.txt"
-        new_file.parent.mkdir()
-        new_file.write_text("newer content")
-        
-        resolved_path = resolve_duplicate_file(existing_file, new_file, "newest", output_manager)
-        
-        # Should return existing_file path (overwrite with newer)
-        assert resolved_path == existing_file
+def test_recursive_flatten_with_duplicates(tmp_path, output_manager):
+    """Test recursive flattening with duplicate file handling"""
+    # Create directory structure with duplicate filenames
+    (tmp_path / "folder1").mkdir()
+    (tmp_path / "folder2").mkdir()
+    
+    # Create files with same name but different content
+    (tmp_path / "folder1" / "duplicate.txt").write_text("content1")
+    (tmp_path / "folder2" / "duplicate.txt").write_text("content2")
+    
+    # Test recursive flatten with rename strategy
+    flatten_folder(tmp_path, simulate=True, recurse=True, duplicate_strategy="rename", output_manager=output_manager)
+    
+    # Check log file
+    log_files = find_log_files(tmp_path)
+    assert len(log_files) == 1
+    
+    log_data, _ = read_log(log_files[0])
+    
+    # Sort the moves by kind in one pass over the actions
+    moves = {"move": [], "move_renamed": []}
+    for action in log_data["actions"]:
+        if action["action"] in moves:
+            moves[action["action"]].append(action)
+    regular_moves = moves["move"]
+    renamed_moves = moves["move_renamed"]
+    
+    # One should be regular move, one should be move_renamed
+    assert len(regular_moves) == 1
+    assert len(renamed_moves) == 1
+    
+    # Check that the renamed action has strategy info
+    assert "strategy" in renamed_moves[0]
+    assert renamed_moves[0]["strategy"] == "rename"
 
+def test_flatten_folder_many_subfolders(tmp_path, output_manager):
+    """Test non-recursive flattening of enough subfolders to use worker threads"""
+    # Every subfolder holds a uniquely named file and a shared name
+    for i in range(8):
+        sub = tmp_path / f"subfolder{i}"
+        sub.mkdir()
+        (sub / f"file{i}.txt").write_text(f"file{i} content")
+        (sub / "shared.txt").write_text(f"shared {i}")
+    
+    flatten_folder(tmp_path, simulate=False, recurse=False, output_manager=output_manager)
+    
+    remaining = sorted(p.name for p in tmp_path.iterdir() if not p.name.startswith("levelzap.log."))
+    assert not any((tmp_path / f"subfolder{i}").exists() for i in range(8))
+    assert [name for name in remaining if name.startswith("file")] == [f"file{i}.txt" for i in range(8)]
+    # The shared name is kept once and renamed for the other seven
+    shared = [name for name in remaining if name.startswith("shared")]
+    assert len(shared) == 8
+    assert sorted((tmp_path / name).read_text() for name in shared) == [f"shared {i}" for i in range(8)]
 
-def test_duplicate_strategy_largest():
-    """Test largest duplicate strategy"""
-    output_manager = OutputManager()
-    
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        tmp_path = Path(tmp_dir)
-        
-        # Create smaller file
-        existing_file = tmp_path / "test.txt"
-        existing_file.write_text("small")
-        
-        # Create larger file
-        new_file = tmp_path / "subfolder" / "test.txt"
-        new_file.parent.mkdir()
-        new_file.write_text("this is a much larger file content")
-        
-        resolved_path = resolve_duplicate_file(existing_file, new_file, "largest", output_manager)
-        
-        # Should return existing_file path (overwrite with larger)
-        assert resolved_path == existing_file
+
+def test_simulated_renames_are_unique(tmp_path, output_manager):
+    """Test that simulated conflict renames never reuse a name"""
+    (tmp_path / "photo.jpg").write_text("root")
+    (tmp_path / "photo_2.jpg").write_text("taken")
+    for i in range(3):
+        (tmp_path / f"subfolder{i}").mkdir()
+        (tmp_path / f"subfolder{i}" / "photo.jpg").write_text(f"photo {i}")
+    
+    flatten_folder(tmp_path, simulate=True, output_manager=output_manager)
+    
+    log_file = find_log_files(tmp_path)[0]
+    log_data, _ = read_log(log_file)
+    
+    renamed = [Path(action["destination"]).name for action in log_data["actions"] if action["action"] == "move_renamed"]
+    assert renamed == ["photo_1.jpg", "photo_3.jpg", "photo_4.jpg"]
 
 
-def test_recursive_flatten_with_duplicates():
-    """Test recursive flattening with duplicate file handling"""
-    output_manager = OutputManager()
-    
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        tmp_path = Path(tmp_dir)
-        
-        # Create directory structure with duplicate filenames
-        (tmp_path / "folder1").mkdir()
-        (tmp_path / "folder2").mkdir()
-        
-        # Create files with same name but different content
-        (tmp_path / "folder1" / "duplicate.txt").write_text("content1")
-        (tmp_path / "folder2" / "duplicate.txt").write_text("content2")
-        
-        # Test recursive flatten with rename strategy
-        flatten_folder(tmp_path, simulate=True, recurse=True, duplicate_strategy="rename", output_manager=output_manager)
-        
-        # Check log file
-        log_files = list(tmp_path.glob("levelzap.log.*.json"))
-        assert len(log_files) == 1
-        
-        import json
-        with open(log_files[0], 'r') as f:
-            log_data = json.load(f)
-        
-        # Should have both move and move_renamed actions
-        move_actions = [action for action in log_data["actions"] if action["action"] in ["move", "move_renamed"]]
-        assert len(move_actions) == 2
-        
-        # One should be regular move, one should be move_renamed
-        regular_moves = [action for action in move_actions if action["action"] == "move"]
-        renamed_moves = [action for action in move_actions if action["action"] == "move_renamed"]
-        
-        assert len(regular_moves) == 1
-        assert len(renamed_moves) == 1
-        
-        # Check that the renamed action has strategy info
-        assert "strategy" in renamed_moves[0]
-        assert renamed_moves[0]["strategy"] == "rename"
\ No newline at end of file
+def test_overwrite_folder_replaces_and_cleans_up(tmp_path, output_manager):
+    """Test that an overwritten folder is replaced and its old contents deleted"""
+    (tmp_path / "photos").mkdir()
+    (tmp_path / "photos" / "old.jpg").write_text("old")
+    (tmp_path / "subfolder").mkdir()
+    (tmp_path / "subfolder" / "photos").mkdir()
+    (tmp_path / "subfolder" / "photos" / "new.jpg").write_text("new")
+    
+    flatten_folder(tmp_path, simulate=False, overwrite=True, output_manager=output_manager)
+    
+    log_data, _ = read_log(find_log_files(tmp_path)[0])
+    files = sorted(str(p.relative_to(tmp_path)) for p in tmp_path.rglob("*")
+                   if p.is_file() and not p.name.startswith("levelzap.log."))
+    if any(a["action"] == "overwrite_folder" for a in log_data["actions"]):
+        # subfolder came first: photos was replaced, then flattened in turn
+        assert files == ["new.jpg"]
+    else:
+        # photos came first and was flattened before anything replaced it
+        assert files == ["old.jpg", os.path.join("photos", "new.jpg")]
+    assert not any(".levelzap_trash" in p.name for p in tmp_path.iterdir())
+
+
+def test_revert_recovers_folder_awaiting_deletion(tmp_path, output_manager):
+    """Test reverting an overwrite whose replaced folder was not deleted yet"""
+    # State left by a run interrupted before the background deletion
+    (tmp_path / "photos").mkdir()
+    (tmp_path / "photos" / "new.jpg").write_text("new")
+    trash = tmp_path / "photos.levelzap_trash.1.1"
+    trash.mkdir()
+    (trash / "old.jpg").write_text("old")
+    log_path = tmp_path / "levelzap.log.1.json"
+    with LogWriter(log_path, {"version": "test", "simulated": False}) as log:
+        log.append({"action": "overwrite_folder", "source": str(tmp_path / "subfolder" / "photos"),
+                    "destination": str(tmp_path / "photos"), "trash_path": str(trash)})
+        log.append({"action": "delete_folder", "source": str(tmp_path / "subfolder")})
+    
+    revert_log(log_path, keep_log=False, output_manager=output_manager)
+    
+    assert (tmp_path / "photos" / "old.jpg").read_text() == "old"
+    assert (tmp_path / "subfolder" / "photos" / "new.jpg").read_text() == "new"
+    assert not trash.exists()
+
+
+def test_revert_skips_unreadable_entry(tmp_path, output_manager, capsys):
+    """Test that an undecodable log line is reported and the rest reverted"""
+    (tmp_path / "first.txt").write_text("first")
+    (tmp_path / "second.txt").write_text("second")
+    log_path = tmp_path / "levelzap.log.1.json"
+    with LogWriter(log_path, {"version": "test", "simulated": False}) as log:
+        for name in ("first.txt", "second.txt"):
+            log.append({"action": "move", "source": str(tmp_path / "subfolder" / name),
+                        "destination": str(tmp_path / name)})
+    # Break the first entry but keep the log sealed
+    raw = log_path.read_bytes()
+    body = raw.split(LOG_HASH_MARKER)[0].replace(b'{"action":"move","source"', b'{"action":"move",,"source"', 1)
+    log_path.write_bytes(body + LOG_HASH_MARKER + hashlib.sha256(body).hexdigest().encode() + b'"}\n')
+    capsys.readouterr()
+    
+    revert_log(log_path, keep_log=False, output_manager=output_manager)
+    
+    out = capsys.readouterr().out
+    assert "Skipping unreadable log entry on line 3" in out
+    assert (tmp_path / "subfolder" / "second.txt").read_text() == "second"
+    assert (tmp_path / "first.txt").read_text() == "first"
+    # Kept, since it still records the move that was not undone
+    assert log_path.exists()
+
+
+def test_revert_flatten_restores_tree(tmp_path, output_manager):
+    """Test that reverting a flatten log puts every file back"""
+    (tmp_path / "root.txt").write_text("root")
+    for i in range(3):
+        (tmp_path / f"subfolder{i}").mkdir()
+        (tmp_path / f"subfolder{i}" / "root.txt").write_text(f"copy {i}")
+        (tmp_path / f"subfolder{i}" / f"file{i}.txt").write_text(f"file{i}")
+    before = sorted((str(p.relative_to(tmp_path)), p.read_text() if p.is_file() else None) for p in tmp_path.rglob("*"))
+    
+    flatten_folder(tmp_path, simulate=False, output_manager=output_manager)
+    log_file = find_log_files(tmp_path)[0]
+    revert_log(log_file, keep_log=False, output_manager=output_manager)
+    
+    after = sorted((str(p.relative_to(tmp_path)), p.read_text() if p.is_file() else None) for p in tmp_path.rglob("*"))
+    assert after == before
+    assert not log_file.exists()
+
+
+def test_revert_flatten_of_undecodable_name(tmp_path, output_manager):
+    """Test that a file name that is not valid UTF-8 is flattened and reverted"""
+    sub = os.path.join(os.fsencode(tmp_path), b"subfolder")
+    os.mkdir(sub)
+    try:
+        with open(os.path.join(sub, b"bad\xffname.txt"), "wb") as f:
+            f.write(b"data")
+    except OSError:
+        pytest.skip("filesystem requires UTF-8 file names")
+    
+    flatten_folder(tmp_path, simulate=False, output_manager=output_manager)
+    assert b"bad\xffname.txt" in os.listdir(os.fsencode(tmp_path))
+    
+    revert_log(find_log_files(tmp_path)[0], keep_log=False, output_manager=output_manager)
+    assert os.listdir(sub) == [b"bad\xffname.txt"]
+    assert find_log_files(tmp_path) == []
+
+
+def test_recursive_flatten_leaves_root_files_in_place(tmp_path, output_manager):
+    """Test that files already in root are not logged as moves"""
+    (tmp_path / "root.txt").write_text("root")
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "a" / "b" / "root.txt").write_text("nested")
+    (tmp_path / "a" / "b" / "deep.txt").write_text("deep")
+    
+    flatten_folder(tmp_path, simulate=False, recurse=True, output_manager=output_manager)
+    
+    assert (tmp_path / "root.txt").read_text() == "root"
+    assert (tmp_path / "root_1.txt").read_text() == "nested"
+    assert (tmp_path / "deep.txt").read_text() == "deep"
+    assert not (tmp_path / "a").exists()
+    
+    log_file = find_log_files(tmp_path)[0]
+    data, _ = read_log(log_file)
+    assert all(a.get("source") != a.get("destination") for a in data["actions"])
+
+
+@pytest.mark.parametrize("padding", [0, 6], ids=["serial", "threaded"])
+def test_merge_into_sibling_processed_later(tmp_path, output_manager, capsys, padding):
+    """Test that a subfolder merged into is read again when its turn comes"""
+    # Each folder holds one named after the other, so whichever is
+    # processed first merges into the one that comes after it
+    make_tree(tmp_path, {
+        "a/b/x.txt": b"x",
+        "b/a/z.txt": b"z",
+        **{f"pad{i}/p{i}.txt": b"p" for i in range(padding)},
+    })
+    
+    flatten_folder(tmp_path, simulate=False, merge=True, output_manager=output_manager)
+    
+    assert "Could not delete folder" not in capsys.readouterr().out
+    files = {str(p.relative_to(tmp_path)) for p in tmp_path.rglob("*")
+             if p.is_file() and not p.name.startswith("levelzap.log.")}
+    padded = {f"p{i}.txt" for i in range(padding)}
+    # The later folder is flattened too, including what was merged into it
+    assert files in ({os.path.join("a", "z.txt"), "x.txt"} | padded,
+                     {os.path.join("b", "x.txt"), "z.txt"} | padded)
+
+
+def test_flatten_progress_adds_up(tmp_path, output_manager, monkeypatch):
+    """Test that the progress bar ends exactly at its total after merges"""
+    import io
+    import tqdm
+
+    finished = []
+
+    class RecordingBar(tqdm.tqdm):
+        # Always enabled, since a disabled bar never advances
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **dict(kwargs, disable=False, file=io.StringIO()))
+
+        def __exit__(self, *exc):
+            finished.append((self.n, self.total))
+            return super().__exit__(*exc)
+
+    monkeypatch.setattr(tqdm, "tqdm", RecordingBar)
+    make_tree(tmp_path, {
+        "a/b/x.txt": b"x",
+        "a/b/y.txt": b"y",
+        "b/a/z.txt": b"z",
+        "b/a/w.txt": b"w",
+        "b/c.txt": b"c",
+    })
+
+    flatten_folder(tmp_path, simulate=False, merge=True, output_manager=output_manager)
+
+    assert len(finished) == 1
+    done, total = finished[0]
+    assert done == total
@@ -1,8 +1,7 @@
-import sys
-from pathlib import Path
+import json
 
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-from levelzap import flatten_folder, verify_all_logs
+import levelzap
+from levelzap import flatten_folder, verify_all_logs, find_log_files, revert_log, list_logs
 
 def test_verify_simulation_log(tmp_path, capsys):
     sub = tmp_path / "subfolder"
@@ -15,3 +14,128 @@ def test_verify_simulation_log(tmp_path, capsys):
     verify_all_logs(tmp_path)
     captured = capsys.readouterr()
     assert "passed integrity check" in captured.out
+
+
+def test_verify_detects_modified_log(tmp_path, capsys):
+    sub = tmp_path / "subfolder"
+    sub.mkdir()
+    (sub / "file.txt").write_text("data")
+    flatten_folder(tmp_path, simulate=True)
+    log_file = find_log_files(tmp_path)[0]
+    # Flip the simulated flag so the log would become revertible
+    log_file.write_bytes(log_file.read_bytes().replace(b'"simulated":true', b'"simulated":false'))
+    capsys.readouterr()
+    verify_all_logs(tmp_path)
+    captured = capsys.readouterr()
+    assert "failed integrity check" in captured.out
+
+
+def test_find_log_files_orders_by_creation(tmp_path):
+    for name in ["levelzap.log.1000.json", "levelzap.log.999.json", "notes.json", "levelzap.log.5.txt"]:
+        (tmp_path / name).write_text("{}")
+
+    assert [p.name for p in find_log_files(tmp_path)] == ["levelzap.log.999.json", "levelzap.log.1000.json"]
+    assert [p.name for p in find_log_files(tmp_path, newest_first=True)] == ["levelzap.log.1000.json", "levelzap.log.999.json"]
+
+
+def test_revert_keep_log_marks_log(tmp_path, capsys):
+    sub = tmp_path / "subfolder"
+    sub.mkdir()
+    (sub / "file.txt").write_text("data")
+    flatten_folder(tmp_path)
+    log_file = find_log_files(tmp_path)[0]
+
+    revert_log(log_file, keep_log=True)
+
+    assert (sub / "file.txt").read_text() == "data"
+    with open(log_file, "r") as f:
+        log_data = json.load(f)
+    assert "timestamp" in log_data["reverted"]
+    capsys.readouterr()
+    verify_all_logs(tmp_path)
+    assert "passed integrity check" in capsys.readouterr().out
+
+
+def test_revert_keep_log_twice_keeps_log_valid(tmp_path, capsys):
+    sub = tmp_path / "subfolder"
+    sub.mkdir()
+    (sub / "file.txt").write_text("data")
+    flatten_folder(tmp_path)
+    log_file = find_log_files(tmp_path)[0]
+    hashed = log_file.read_bytes().split(levelzap.LOG_HASH_MARKER)[0]
+
+    revert_log(log_file, keep_log=True)
+    revert_log(log_file, keep_log=True)
+
+    raw = log_file.read_bytes()
+    # Still a current log: the hashed body is untouched and the single
+    # reverted marker was updated in place
+    assert raw.startswith(hashed + levelzap.LOG_HASH_MARKER)
+    assert raw.count(b'"reverted"') == 1
+    assert "timestamp" in json.loads(raw)["reverted"]
+    capsys.readouterr()
+    verify_all_logs(tmp_path)
+    assert "passed integrity check" in capsys.readouterr().out
+
+
+def test_verify_uses_recorded_hash_algo(tmp_path, capsys, monkeypatch):
+    monkeypatch.setattr(levelzap, "LOG_HASH_ALGORITHM", "blake2b")
+    sub = tmp_path / "subfolder"
+    sub.mkdir()
+    (sub / "file.txt").write_text("data")
+    flatten_folder(tmp_path, simulate=True)
+    monkeypatch.undo()
+
+    log_file = find_log_files(tmp_path)[0]
+    with open(log_file, "r") as f:
+        assert json.load(f)["meta"]["hash_algo"] == "blake2b"
+    capsys.readouterr()
+    verify_all_logs(tmp_path)
+    assert "passed integrity check" in capsys.readouterr().out
+
+
+def test_verify_many_logs_reports_in_order(tmp_path, capsys):
+    sub = tmp_path / "subfolder"
+    sub.mkdir()
+    (sub / "file.txt").write_text("data")
+    flatten_folder(tmp_path, simulate=True)
+    log_file = find_log_files(tmp_path)[0]
+    raw = log_file.read_bytes()
+    for epoch in (1, 2, 3):
+        (tmp_path / f"levelzap.log.{epoch}.json").write_bytes(raw.replace(b"file.txt", b"moved.txt") if epoch == 2 else raw)
+    (tmp_path / "levelzap.log.4.json").write_text("not json")
+
+    capsys.readouterr()
+    verify_all_logs(tmp_path)
+    lines = capsys.readouterr().out.splitlines()
+    assert "levelzap.log.1.json passed" in lines[0]
+    assert "levelzap.log.2.json failed" in lines[1]
+    assert "levelzap.log.3.json passed" in lines[2]
+    assert "Failed to verify levelzap.log.4.json" in lines[3]
+    assert f"{log_file.name} passed" in lines[4]
+
+
+def test_list_logs_reuses_cached_checks(tmp_path, capsys, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    work = tmp_path / "work"
+    (work / "subfolder").mkdir(parents=True)
+    (work / "subfolder" / "file.txt").write_text("data")
+    flatten_folder(work, simulate=True)
+    list_logs(work)
+    assert "Valid" in capsys.readouterr().out
+    # Written via a temporary file that is renamed into place
+    assert [p.name for p in (tmp_path / "cache" / "levelzap").iterdir()] == ["verified.json"]
+
+    def not_again(log_file):
+        raise AssertionError("unchanged log read again")
+
+    monkeypatch.setattr(levelzap, "_check_log", not_again)
+    list_logs(work)
+    assert "Valid" in capsys.readouterr().out
+
+    monkeypatch.undo()
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    log_file = find_log_files(work)[0]
+    log_file.write_bytes(log_file.read_bytes().replace(b"file.txt", b"edit.txt"))
+    list_logs(work)
+    assert "Corrupt" in capsys.readouterr().out